@@ -0,0 +1,107 @@
+# Conversor de animações da matriz 5x5 para o formato .anim
+#
+# Roda no computador (CPython 3):
+#   python3 Ferramentas/anim_conv.py entrada.json [saida.anim] [--sem-delta]
+#   python3 Ferramentas/anim_conv.py --mostrar arquivo.anim
+#
+# A entrada é um JSON com uma paleta de cores (r, g, b) e a lista de
+# quadros; cada quadro tem a duração em ms e as 25 cores na ordem física
+# dos LEDs, como nas listas `colors` do Outros Códigos/main.py:
+#   {"paleta": {"K": [0, 0, 0], "R": [50, 0, 0]},
+#    "quadros": [{"ms": 200, "leds": ["K", "K", "R", ...]}, ...]}
+# Uma cor também pode vir direto como [r, g, b]; outras chaves, como
+# "descricao", são ignoradas.
+#
+# O formato está descrito em Menu_interativo/animacao.py, que toca os
+# arquivos na placa. Cada quadro sai completo (75 bytes) ou, se for menor,
+# só com os LEDs que mudaram em relação ao anterior.
+
+import json
+import struct
+import sys
+
+MAGICO = b"ANI5"
+VERSAO = 1
+DELTA = 0x01
+COMPLETO = 0
+TIPO_DELTA = 1
+NUM_LEDS = 25
+
+
+def cores(quadro, paleta, n):
+    leds = quadro["leds"]
+    if len(leds) != NUM_LEDS:
+        raise ValueError("quadro %d: %d LEDs, esperado %d" % (n, len(leds), NUM_LEDS))
+    saida = []
+    for cor in leds:
+        if isinstance(cor, str):
+            cor = paleta[cor]
+        r, g, b = cor
+        saida.append((g, r, b))  # ordem do WS2812B
+    return saida
+
+
+def codificar(dados, delta=True):
+    paleta = dados.get("paleta", {})
+    quadros = dados["quadros"]
+    corpo = bytearray()
+    anterior = None
+    usou_delta = False
+    for n, quadro in enumerate(quadros):
+        atual = cores(quadro, paleta, n)
+        ms = quadro["ms"]
+        mudaram = None
+        if delta and anterior is not None:
+            mudaram = [i for i in range(NUM_LEDS) if atual[i] != anterior[i]]
+        if mudaram is not None and 4 * len(mudaram) < 3 * NUM_LEDS:
+            corpo += struct.pack("<HBB", ms, TIPO_DELTA, len(mudaram))
+            for i in mudaram:
+                corpo += bytes((i,) + atual[i])
+            usou_delta = True
+        else:
+            corpo += struct.pack("<HBB", ms, COMPLETO, NUM_LEDS)
+            for g, r, b in atual:
+                corpo += bytes((g, r, b))
+        anterior = atual
+    cabecalho = MAGICO + struct.pack("<BBH", VERSAO, DELTA if usou_delta else 0, len(quadros))
+    return cabecalho + bytes(corpo)
+
+
+def mostrar(arquivo):
+    with open(arquivo, "rb") as f:
+        dados = f.read()
+    if dados[:4] != MAGICO:
+        raise ValueError("nao e um arquivo .anim")
+    versao, flags, quadros = struct.unpack_from("<BBH", dados, 4)
+    print("%s: versao %d, %d quadros, %d bytes" % (arquivo, versao, quadros, len(dados)))
+    pos = 8
+    for n in range(quadros):
+        ms, tipo, leds = struct.unpack_from("<HBB", dados, pos)
+        pos += 4
+        tamanho = 3 * NUM_LEDS if tipo == COMPLETO else 4 * leds
+        print("  %2d: %5d ms  %s  %d LEDs" % (n, ms, "completo" if tipo == COMPLETO else "delta   ", leds))
+        pos += tamanho
+
+
+def main(args):
+    if len(args) == 2 and args[0] == "--mostrar":
+        mostrar(args[1])
+        return
+    delta = "--sem-delta" not in args
+    args = [a for a in args if a != "--sem-delta"]
+    if not 1 <= len(args) <= 2:
+        print("uso: anim_conv.py entrada.json [saida.anim] [--sem-delta]")
+        print("     anim_conv.py --mostrar arquivo.anim")
+        sys.exit(1)
+    entrada = args[0]
+    saida = args[1] if len(args) == 2 else entrada.rsplit(".", 1)[0] + ".anim"
+    with open(entrada) as f:
+        dados = json.load(f)
+    binario = codificar(dados, delta)
+    with open(saida, "wb") as f:
+        f.write(binario)
+    print("%s: %d quadros, %d bytes" % (saida, len(dados["quadros"]), len(binario)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
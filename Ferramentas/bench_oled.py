@@ -0,0 +1,102 @@
+# Benchmark e teste de regressão do ssd1306.py sem placa
+#
+# Roda no porte Unix do MicroPython (o driver precisa de framebuf):
+#   micropython Ferramentas/bench_oled.py [pasta_para_png]
+#
+# Cada cenário desenha os mesmos quadros em dois displays emulados: um
+# recebe sempre o quadro inteiro (show(full=True)) e serve de referência,
+# o outro usa o modo testado. Depois de cada quadro a GDDRAM dos dois tem
+# de ser idêntica; no fim sai a média de transações e bytes por quadro.
+
+import sys
+
+_dir = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+sys.path.append(_dir)
+sys.path.append(_dir + "/../Menu_interativo")
+
+from ssd1306 import SSD1306_I2C, SSD1306_SPI
+from ssd1306_emu import SSD1306Emu, EmuI2C, EmuSPI, EmuPin
+
+QUADROS = 60
+
+
+def cena_snake(oled, n):
+    # como o draw() do Snake_GPT(OLED): a cobra anda uma célula por quadro
+    oled.fill(0)
+    oled.text("Score:%d" % (n // 10), 0, 0)
+    oled.fill_rect(100, 40, 4, 4, 1)
+    for i in range(6):
+        x = (n + i) % 32
+        oled.fill_rect(x * 4, 32, 4, 4, 1)
+
+
+def cena_menu(oled, n):
+    # como o desenhar_menu() do launcher: a seleção muda a cada 5 quadros
+    oled.fill(0)
+    oled.text("Menu Principal", 0, 0)
+    sel = n // 5
+    for i in range(4):
+        prefixo = ">" if i == 0 else " "
+        oled.text("%s item_%d.py" % (prefixo, (sel + i) % 9), 0, 12 + i * 10)
+
+
+def cena_estatica(oled, n):
+    oled.fill(0)
+    oled.text("Temp: 25.00 C", 0, 20)
+
+
+def _i2c():
+    emu = SSD1306Emu()
+    return SSD1306_I2C(128, 64, EmuI2C(emu)), emu
+
+
+def _spi():
+    emu = SSD1306Emu()
+    dc = EmuPin()
+    cs = EmuPin(1)
+    return SSD1306_SPI(128, 64, EmuSPI(emu, dc, cs), dc, EmuPin(), cs), emu
+
+
+def rodar(nome, cena, fabrica, modo):
+    ref, emu_ref = _i2c()
+    oled, emu = fabrica()
+    emu.mark()
+    total_tx = total_bytes = total_dados = 0
+    for n in range(QUADROS):
+        cena(ref, n)
+        ref.show(full=True)
+        cena(oled, n)
+        if modo == "full":
+            oled.show(full=True)
+        else:
+            oled.show()
+        tx, nbytes, dados = emu.mark()
+        total_tx += tx
+        total_bytes += nbytes
+        total_dados += dados
+        if emu.framebuffer() != emu_ref.framebuffer():
+            print("ERRO: %s/%s difere da referência no quadro %d" % (nome, modo, n))
+            return emu, False
+    print(
+        "%-8s %-5s %-8s %6.1f tx %7.1f B %7.1f B de pixels"
+        % (nome, fabrica.__name__[1:], modo, total_tx / QUADROS,
+           total_bytes / QUADROS, total_dados / QUADROS)
+    )
+    return emu, True
+
+
+def main():
+    print("cena     bus   modo      por quadro")
+    ok = True
+    for nome, cena in (("snake", cena_snake), ("menu", cena_menu), ("estatica", cena_estatica)):
+        for fabrica in (_i2c, _spi):
+            for modo in ("full", "parcial"):
+                emu, certo = rodar(nome, cena, fabrica, modo)
+                ok = ok and certo
+        if len(sys.argv) > 1:
+            emu.save_png("%s/%s.png" % (sys.argv[1], nome))
+    print("OK" if ok else "FALHOU")
+    sys.exit(0 if ok else 1)
+
+
+main()
@@ -0,0 +1,336 @@
+# Emulador do controlador SSD1306 para rodar no PC (sem placa)
+#
+# Decodifica o fluxo real de comandos e dados que o ssd1306.py envia
+# (init_display, show, scroll...) para uma GDDRAM emulada, conta bytes e
+# transações e exporta o quadro como PBM ou PNG.
+#
+# O emulador é Python puro e roda no CPython. O driver ssd1306.py depende
+# de framebuf, então os scripts que o usam (bench_oled.py) rodam no porte
+# Unix do MicroPython.
+#
+# Uso:
+#   emu = SSD1306Emu()
+#   oled = SSD1306_I2C(128, 64, EmuI2C(emu))
+#   oled.text("Oi", 0, 0); oled.show()
+#   emu.save_png("quadro.png")
+
+# número de bytes de argumento de cada comando com parâmetros
+_ARGS = {
+    0x81: 1,  # contraste
+    0x20: 1,  # modo de endereçamento
+    0x21: 2,  # janela de colunas
+    0x22: 2,  # janela de páginas
+    0xA8: 1,  # multiplex
+    0xD3: 1,  # deslocamento vertical
+    0xDA: 1,  # configuração dos pinos COM
+    0xD5: 1,  # divisor de clock
+    0xD9: 1,  # pré-carga
+    0xDB: 1,  # nível VCOMH
+    0x8D: 1,  # charge pump
+    0x26: 6,  # scroll horizontal para a direita
+    0x27: 6,  # scroll horizontal para a esquerda
+    0x29: 5,  # scroll diagonal para a direita
+    0x2A: 5,  # scroll diagonal para a esquerda
+    0xA3: 2,  # área de scroll vertical
+}
+
+HORIZONTAL = 0
+VERTICAL = 1
+PAGE = 2
+
+
+class SSD1306Emu:
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        # a GDDRAM tem sempre 128 colunas x 8 páginas
+        self.ram = bytearray(128 * 8)
+        self.mode = PAGE  # valor após reset
+        self.col_start = 0
+        self.col_end = 127
+        self.page_start = 0
+        self.page_end = 7
+        self.col = 0
+        self.page = 0
+        self.display_on = False
+        self.inverted = False
+        self.entire_on = False
+        self.contrast = 0x7F
+        self.start_line = 0
+        self.scrolling = False
+        self.scroll = None  # último comando de scroll recebido
+        self.commands = 0
+        self.data_bytes = 0
+        self._cmd = None  # comando aguardando argumentos
+        self.transactions = 0
+        self.bytes = 0
+        self._mark = (0, 0, 0)
+
+    # --- decodificação ---
+
+    def command(self, byte):
+        self.commands += 1
+        if self._cmd is not None:
+            self._cmd.append(byte)
+            if len(self._cmd) > _ARGS[self._cmd[0]]:
+                cmd = self._cmd
+                self._cmd = None
+                self._execute(cmd[0], cmd[1:])
+            return
+        if byte in _ARGS:
+            self._cmd = [byte]
+        else:
+            self._execute(byte, ())
+
+    def _execute(self, op, args):
+        if op == 0x81:
+            self.contrast = args[0]
+        elif op == 0x20:
+            self.mode = args[0] & 0x03
+        elif op == 0x21:
+            self.col_start = self.col = args[0] & 0x7F
+            self.col_end = args[1] & 0x7F
+        elif op == 0x22:
+            self.page_start = self.page = args[0] & 0x07
+            self.page_end = args[1] & 0x07
+        elif op in (0xAE, 0xAF):
+            self.display_on = op == 0xAF
+        elif op in (0xA6, 0xA7):
+            self.inverted = op == 0xA7
+        elif op in (0xA4, 0xA5):
+            self.entire_on = op == 0xA5
+        elif 0x40 <= op <= 0x7F:
+            self.start_line = op & 0x3F
+        elif 0xB0 <= op <= 0xB7:
+            self.page = op & 0x07
+        elif op <= 0x0F:
+            self.col = (self.col & 0xF0) | op
+        elif op <= 0x1F:
+            self.col = (self.col & 0x0F) | ((op & 0x0F) << 4)
+        elif op in (0x26, 0x27, 0x29, 0x2A):
+            self.scroll = (op,) + tuple(args)
+        elif op == 0x2E:
+            self.scrolling = False
+        elif op == 0x2F:
+            self.scrolling = True
+        # os demais (multiplex, clock, remapeamento...) só configuram o painel
+
+    def data(self, byte):
+        self.data_bytes += 1
+        self.ram[self.page * 128 + self.col] = byte
+        if self.mode == HORIZONTAL:
+            if self.col < self.col_end:
+                self.col += 1
+            else:
+                self.col = self.col_start
+                self.page = self.page + 1 if self.page < self.page_end else self.page_start
+        elif self.mode == VERTICAL:
+            if self.page < self.page_end:
+                self.page += 1
+            else:
+                self.page = self.page_start
+                self.col = self.col + 1 if self.col < self.col_end else self.col_start
+        elif self.col < 127:
+            self.col += 1
+
+    def i2c_write(self, buf):
+        # o primeiro byte é de controle: Co (bit 7) e D/C# (bit 6)
+        self.transactions += 1
+        self.bytes += len(buf)
+        i = 0
+        n = len(buf)
+        while i < n:
+            control = buf[i]
+            i += 1
+            write = self.data if control & 0x40 else self.command
+            if control & 0x80:
+                # Co=1: um único byte e depois outro byte de controle
+                if i < n:
+                    write(buf[i])
+                    i += 1
+            else:
+                # Co=0: todo o resto da transação é do mesmo tipo
+                while i < n:
+                    write(buf[i])
+                    i += 1
+
+    # --- contagem por quadro ---
+
+    def mark(self):
+        # transações, bytes e bytes de dados desde a última chamada
+        t, b, d = self._mark
+        self._mark = (self.transactions, self.bytes, self.data_bytes)
+        return self.transactions - t, self.bytes - b, self.data_bytes - d
+
+    # --- imagem ---
+
+    def framebuffer(self):
+        # conteúdo visível no formato MONO_VLSB do driver (telas de 64
+        # colunas ficam nas colunas 32..95 da RAM). O remapeamento de
+        # segmentos/COM só compensa a montagem do painel e não é aplicado.
+        x0 = 32 if self.width == 64 else 0
+        out = bytearray(self.width * self.pages)
+        for page in range(self.pages):
+            start = page * 128 + x0
+            out[page * self.width : (page + 1) * self.width] = self.ram[start : start + self.width]
+        return out
+
+    def pixel(self, x, y):
+        x0 = 32 if self.width == 64 else 0
+        lit = (self.ram[(y >> 3) * 128 + x0 + x] >> (y & 7)) & 1
+        if self.entire_on:
+            lit = 1
+        return lit ^ self.inverted if self.display_on else 0
+
+    def rows(self):
+        for y in range(self.height):
+            yield [self.pixel(x, y) for x in range(self.width)]
+
+    def save_pbm(self, path):
+        # PBM binário; pixels acesos saem brancos, como na tela
+        out = bytearray()
+        for row in self.rows():
+            out += _pack_bits(row, invert=True)
+        with open(path, "wb") as f:
+            f.write(("P4\n%d %d\n" % (self.width, self.height)).encode())
+            f.write(out)
+
+    def save_png(self, path):
+        # PNG em tons de cinza de 1 bit, com blocos deflate sem compressão
+        raw = bytearray()
+        for row in self.rows():
+            raw.append(0)  # filtro "None"
+            raw += _pack_bits(row)
+        header = bytes((0x89,)) + b"PNG\r\n\x1a\n"
+        ihdr = (
+            self.width.to_bytes(4, "big")
+            + self.height.to_bytes(4, "big")
+            + bytes((1, 0, 0, 0, 0))  # 1 bit, cinza, sem entrelaçamento
+        )
+        with open(path, "wb") as f:
+            f.write(header)
+            f.write(_png_chunk(b"IHDR", ihdr))
+            f.write(_png_chunk(b"IDAT", _zlib_stored(raw)))
+            f.write(_png_chunk(b"IEND", b""))
+
+    def ascii(self):
+        return "\n".join("".join("#" if p else "." for p in row) for row in self.rows())
+
+
+class EmuI2C:
+    # Substitui SoftI2C/I2C: cada writeto/writevto é uma transação
+    def __init__(self, *displays, addr=0x3C):
+        self.devices = {}
+        for i, emu in enumerate(displays):
+            self.devices[addr + i] = emu
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def _device(self, addr):
+        try:
+            return self.devices[addr]
+        except KeyError:
+            raise OSError(19)  # ENODEV, como um NACK no endereço
+
+    def writeto(self, addr, buf, stop=True):
+        self._device(addr).i2c_write(bytes(buf))
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        buf = bytearray()
+        for part in vector:
+            buf += part
+        self._device(addr).i2c_write(buf)
+        return len(buf)
+
+
+class EmuPin:
+    OUT = 1
+    IN = 0
+
+    def __init__(self, value=0):
+        self._value = value
+
+    def init(self, mode=None, value=None):
+        if value is not None:
+            self._value = value
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+
+class EmuSPI:
+    # Substitui machine.SPI: o pino DC decide se os bytes são comando ou dado
+    def __init__(self, emu, dc, cs):
+        self.emu = emu
+        self.dc = dc
+        self.cs = cs
+        self.inits = 0
+
+    def init(self, **kwargs):
+        self.inits += 1
+
+    def write(self, buf):
+        if self.cs():
+            return  # chip não selecionado
+        emu = self.emu
+        emu.transactions += 1
+        emu.bytes += len(buf)
+        write = emu.data if self.dc() else emu.command
+        for byte in buf:
+            write(byte)
+
+
+def _pack_bits(row, invert=False):
+    out = bytearray((len(row) + 7) // 8)
+    for x, p in enumerate(row):
+        if p ^ invert:
+            out[x >> 3] |= 0x80 >> (x & 7)
+    return out
+
+
+def _crc32(data, crc=0):
+    crc ^= 0xFFFFFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xEDB88320 if crc & 1 else 0)
+    return crc ^ 0xFFFFFFFF
+
+
+def _adler32(data):
+    a = 1
+    b = 0
+    for byte in data:
+        a = (a + byte) % 65521
+        b = (b + a) % 65521
+    return (b << 16) | a
+
+
+def _zlib_stored(data):
+    out = bytearray(b"\x78\x01")
+    for i in range(0, max(len(data), 1), 65535):
+        block = data[i : i + 65535]
+        last = 1 if i + 65535 >= len(data) else 0
+        n = len(block)
+        out.append(last)
+        out += n.to_bytes(2, "little") + (n ^ 0xFFFF).to_bytes(2, "little")
+        out += block
+    out += _adler32(data).to_bytes(4, "big")
+    return out
+
+
+def _png_chunk(kind, payload):
+    return (
+        len(payload).to_bytes(4, "big")
+        + kind
+        + payload
+        + _crc32(kind + payload).to_bytes(4, "big")
+    )
@@ -1,23 +1,18 @@
-from machine import Pin, ADC, PWM, SoftI2C
+from machine import Pin, ADC, PWM
 import neopixel
+from neomatriz import matriz_led
+import bitdoglab
 import utime
 import random
-from ssd1306 import SSD1306_I2C
 
 # --- Configurações de Hardware ---
-i2c_oled = SoftI2C(scl=Pin(15), sda=Pin(14))
-oled = SSD1306_I2C(128, 64, i2c_oled)
+# OLED de bitdoglab: o mesmo I2C1 do launcher, sem reabrir o display
+oled = bitdoglab.oled()
 
 NUM_LEDS = 25
 np = neopixel.NeoPixel(Pin(7), NUM_LEDS)
 
-LED_MATRIX = [
-    [24, 23, 22, 21, 20],
-    [15, 16, 17, 18, 19],
-    [14, 13, 12, 11, 10],
-    [5, 6, 7, 8, 9],
-    [4, 3, 2, 1, 0]
-]
+LED_MATRIX = matriz_led()  # LED_MATRIX[y][x] -> índice do LED (serpentina)
 
 vrx = ADC(27)
 vry = ADC(26)
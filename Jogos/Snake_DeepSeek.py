@@ -1,20 +1,14 @@
 from machine import Pin, PWM, ADC
 import neopixel
+from neomatriz import matriz_led
 import utime
 import random
-from ssd1306 import SSD1306_I2C
-from machine import SoftI2C
+import bitdoglab
 
 # --- Configurações de Hardware ---
 # NeoPixel (Matriz 5x5)
 np = neopixel.NeoPixel(Pin(7), 25)
-LED_MATRIX = [
-    [24, 23, 22, 21, 20],
-    [15, 16, 17, 18, 19],
-    [14, 13, 12, 11, 10],
-    [5, 6, 7, 8, 9],
-    [4, 3, 2, 1, 0]
-]
+LED_MATRIX = matriz_led()  # LED_MATRIX[y][x] -> índice do LED (serpentina)
 
 # Buzzer
 buzzer = PWM(Pin(10))
@@ -28,9 +22,8 @@ joy_x = ADC(27)
 joy_y = ADC(26)
 joy_btn = Pin(22, Pin.IN, Pin.PULL_UP)
 
-# OLED
-i2c = SoftI2C(scl=Pin(15), sda=Pin(14))
-oled = SSD1306_I2C(128, 64, i2c)
+# OLED (de bitdoglab: o mesmo I2C1 do launcher, sem reabrir o display)
+oled = bitdoglab.oled()
 
 # --- Constantes do Jogo ---
 LARGURA = 5
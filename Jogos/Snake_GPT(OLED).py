@@ -1,24 +1,32 @@
-from machine import Pin, SoftI2C, ADC, PWM
-from ssd1306 import SSD1306_I2C
-import neopixel
+from machine import Pin
+from textcache import TextCache
+from neomatriz import Quadro
+import bitdoglab
 import utime
 import random
 
+# Os periféricos vêm de bitdoglab: aberto pelo launcher, o jogo reaproveita
+# o display e a matriz que já estão prontos
+
 # --- OLED ---
-i2c = SoftI2C(scl=Pin(15), sda=Pin(14))
-oled = SSD1306_I2C(128, 64, i2c)
+oled = bitdoglab.oled()
+MEDIR_OLED = False  # True: mostra no console o custo do display a cada 100 quadros
+if MEDIR_OLED:
+    oled.enable_stats()
+textos = TextCache()  # placar e avisos são desenhados a partir do cache
 
 # --- Joystick ---
-x_axis = ADC(Pin(27))
-y_axis = ADC(Pin(26))
-sw_button = Pin(22, Pin.IN, Pin.PULL_UP)
+joystick = bitdoglab.joystick()
+x_axis = joystick.x
+y_axis = joystick.y
+sw_button = joystick.sw
 
 # --- Botões ---
 pause_button = Pin(5, Pin.IN, Pin.PULL_UP)   # Botão A
 speed_button = Pin(6, Pin.IN, Pin.PULL_UP)   # Botão B
 
 # --- Buzzer ---
-buzzer = PWM(Pin(21))
+buzzer = bitdoglab.buzzer_a()
 
 def beep():
     buzzer.freq(1000)
@@ -44,51 +52,37 @@ def play_restart_tone():
     buzzer.duty_u16(0)
 
 # --- NeoPixel Matrix ---
-NUM_LEDS = 25
-np = neopixel.NeoPixel(Pin(7), NUM_LEDS)
-LED_MATRIX = [
-    [24, 23, 22, 21, 20],
-    [15, 16, 17, 18, 19],
-    [14, 13, 12, 11, 10],
-    [5, 6, 7, 8, 9],
-    [4, 3, 2, 1, 0]
-]
-
-def dim(color, factor=0.03):  # 3% intensidade
-    return tuple(int(c * factor) for c in color)
+# Os efeitos desenham direto no buffer da matriz; a tabela de brilho deixa
+# as cores a 3% da intensidade (7/255) sem contas por LED
+quadro = Quadro(bitdoglab.matriz(), brilho=7, gama=1)
 
 def effect_food():
     for _ in range(2):
-        for i in range(NUM_LEDS):
-            np[i] = dim((0, 255, 0))
-        np.write()
+        quadro.preencher(0, 255, 0)
+        quadro.mostrar()
         utime.sleep(0.1)
-        np.fill((0, 0, 0))
-        np.write()
+        quadro.limpar()
+        quadro.mostrar()
         utime.sleep(0.1)
 
 def effect_game_over():
     for step in range(5):
         for y in range(5):
-            for x in range(5):
-                if x + y == step:
-                    led_index = LED_MATRIX[y][x]
-                    np[led_index] = dim((255, 0, 0))
-        np.write()
+            quadro.pixel(step - y, y, 255, 0, 0)  # diagonal x + y == step
+        quadro.mostrar()
         utime.sleep(0.1)
     play_game_over_tone()
-    np.fill((0, 0, 0))
-    np.write()
+    quadro.limpar()
+    quadro.mostrar()
 
 def effect_restart():
     colors = [(255, 255, 0), (0, 255, 255)]
-    for color in colors:
-        for i in range(NUM_LEDS):
-            np[i] = dim(color)
-        np.write()
+    for r, g, b in colors:
+        quadro.preencher(r, g, b)
+        quadro.mostrar()
         utime.sleep(0.1)
-    np.fill((0, 0, 0))
-    np.write()
+    quadro.limpar()
+    quadro.mostrar()
     play_restart_tone()
 
 def show_controls():
@@ -133,14 +127,14 @@ def read_joystick():
 
 def draw():
     oled.fill(0)
-    oled.text(f'Score:{score}', 0, 0)
+    textos.text(oled, f'Score:{score}', 0, 0)
     oled.fill_rect(food[0]*CELL_SIZE, food[1]*CELL_SIZE, CELL_SIZE, CELL_SIZE, 1)
     for segment in snake:
         oled.fill_rect(segment[0]*CELL_SIZE, segment[1]*CELL_SIZE, CELL_SIZE, CELL_SIZE, 1)
     if paused:
-        oled.text("PAUSADO", 40, 28)
+        textos.text(oled, "PAUSADO", 40, 28)
     elif game_over:
-        oled.text("GAME OVER", 30, 28)
+        textos.text(oled, "GAME OVER", 30, 28)
     oled.show()
 
 def update():
@@ -173,8 +167,8 @@ def reset_game():
     score = 0
     paused = False
     game_over = False
-    np.fill((0, 0, 0))
-    np.write()
+    quadro.limpar()
+    quadro.mostrar()
     effect_restart()
     show_controls()
     oled.fill(0)
@@ -211,4 +205,6 @@ while True:
             last_move_time = current_time
 
     draw()
+    if MEDIR_OLED and oled.stats.frames % 100 == 0:
+        print(oled.stats.summary())
     utime.sleep(0.01)
@@ -0,0 +1,113 @@
+# Animações da matriz 5x5 lidas do flash
+#
+# Formato .anim (little-endian), gerado por Ferramentas/anim_conv.py:
+#   cabeçalho, 8 bytes: b"ANI5", versão (1), flags (bit 0: tem quadros
+#                       delta), número de quadros (u16)
+#   cada quadro, 4 bytes + dados: duração em ms (u16), tipo, n
+#     tipo 0 (completo): 75 bytes, 3 por LED na ordem GRB do WS2812B
+#     tipo 1 (delta):    n registros de 4 bytes (índice do LED, g, r, b)
+#                        com os LEDs que mudaram desde o quadro anterior
+# Os LEDs estão na ordem física da matriz (np[0] .. np[24]).
+#
+# O Tocador lê um quadro por vez com readinto direto no buffer do
+# NeoPixel e agenda o próximo num Timer de disparo único, via
+# micropython.schedule. tocar() retorna na hora; a animação segue sozinha
+# e só um quadro fica na RAM.
+#
+#   tocador = Tocador()
+#   tocador.tocar("/animacoes/xplosion.anim")
+#   ...                       # o programa continua
+#   tocador.parar()
+
+from machine import Timer
+import micropython
+
+MAGICO = b"ANI5"
+VERSAO = 1
+DELTA = 0x01
+_COMPLETO = 0
+_CABECALHO = 8
+
+
+class Tocador:
+    def __init__(self, np=None):
+        if np is None:
+            from bitdoglab import matriz
+            np = matriz()
+        self.np = np
+        self.buf = np.buf
+        self.timer = Timer()
+        self.arquivo = None
+        self.repetir = False
+        self.feito = None
+        self.quadros = 0
+        self.quadro = 0
+        self._registro = bytearray(4)
+        self._delta = bytearray(100)  # até 25 LEDs x 4 bytes
+        self._mv_delta = memoryview(self._delta)
+        self._passo_cb = self._passo
+        self._agendar_cb = self._agendar
+
+    @property
+    def tocando(self):
+        return self.arquivo is not None
+
+    def tocar(self, path, repetir=False, feito=None):
+        # começa a animação e retorna; feito() é chamado ao terminar
+        self.parar()
+        arquivo = open(path, "rb")
+        cabecalho = arquivo.read(_CABECALHO)
+        if len(cabecalho) < _CABECALHO or cabecalho[:4] != MAGICO or cabecalho[4] != VERSAO:
+            arquivo.close()
+            raise ValueError("animacao invalida: " + path)
+        self.quadros = cabecalho[6] | cabecalho[7] << 8
+        self.quadro = 0
+        self.arquivo = arquivo
+        self.repetir = repetir
+        self.feito = feito
+        self._passo(None)
+
+    def parar(self):
+        self.timer.deinit()
+        if self.arquivo is not None:
+            self.arquivo.close()
+            self.arquivo = None
+
+    def _agendar(self, t):
+        # callback do Timer: a leitura do flash fica fora da interrupção
+        try:
+            micropython.schedule(self._passo_cb, None)
+        except RuntimeError:
+            # fila cheia: tenta de novo logo em seguida
+            self.timer.init(mode=Timer.ONE_SHOT, period=1, callback=self._agendar_cb)
+
+    def _passo(self, _):
+        arquivo = self.arquivo
+        if arquivo is None:
+            return
+        if self.quadro >= self.quadros:
+            if not self.repetir:
+                self.parar()
+                if self.feito is not None:
+                    self.feito()
+                return
+            arquivo.seek(_CABECALHO)
+            self.quadro = 0
+        registro = self._registro
+        arquivo.readinto(registro)
+        duracao = registro[0] | registro[1] << 8
+        n = registro[3]
+        if registro[2] == _COMPLETO:
+            arquivo.readinto(self.buf)
+        else:
+            dados = self._mv_delta[: 4 * n]
+            arquivo.readinto(dados)
+            buf = self.buf
+            for i in range(0, 4 * n, 4):
+                pos = 3 * dados[i]
+                buf[pos] = dados[i + 1]
+                buf[pos + 1] = dados[i + 2]
+                buf[pos + 2] = dados[i + 3]
+        self.np.write()
+        self.quadro += 1
+        self.timer.init(mode=Timer.ONE_SHOT, period=max(duracao, 1), callback=self._agendar_cb)
@@ -0,0 +1,254 @@
+# Gerência dos barramentos I2C da placa
+#
+# Cada barramento (I2C0 do chip de carga e da extensão, I2C1 do OLED) tem
+# um Barramento, dono do objeto I2C. Os drivers recebem um Dispositivo,
+# que tem os mesmos métodos de machine.I2C e passa cada transação pelo
+# Barramento:
+#
+#   bus = Barramento(I2C(0, ...), "I2C0")
+#   sensor = bus.dispositivo(0x48, "sensor", ALTA)
+#   sensor.readfrom_mem(0x48, 0, 2)
+#
+# - Uma trava impede transações simultâneas vindas do segundo núcleo
+#   (_thread). Uma chamada feita por um callback agendado no meio de outra
+#   sequência do mesmo núcleo roda direto: entre dois bytecodes nenhuma
+#   transação está em andamento.
+# - tomar()/largar() seguram o barramento por várias transações seguidas.
+# - Quem não pode esperar (callbacks, outro núcleo) usa pedir(): se o
+#   barramento estiver ocupado, a transação entra numa fila por
+#   prioridade. Quem tem o barramento só deixa passar os pedidos mais
+#   urgentes que ele; o resto roda, por ordem de prioridade, quando o
+#   barramento é largado. Tudo isso roda com a trava em mãos.
+# - Transferências longas, como o quadro do OLED, seguram o barramento,
+#   são divididas e chamam ceder() entre as partes; os pedidos mais
+#   urgentes na fila passam na frente. O OLED fica sozinho no I2C1, então
+#   isso vale para sensores ligados ao mesmo barramento que ele; no I2C0
+#   (carregador e extensão) as transações são curtas e o que importa é a
+#   trava e a fila entre o programa, callbacks e o outro núcleo.
+# - Cada dispositivo conta transações, bytes e tempo de barramento;
+#   relatorio() mostra a ocupação de cada um.
+
+import utime
+
+try:
+    import _thread
+    _nova_trava = _thread.allocate_lock
+    _ident = _thread.get_ident
+except ImportError:
+    _nova_trava = None
+
+    def _ident():
+        return 0
+
+ALTA = 0
+NORMAL = 1
+BAIXA = 2
+
+
+def _tamanho(metodo, args):
+    # bytes de dados de uma transação (sem o endereço do dispositivo)
+    if metodo == "writevto":
+        n = 0
+        for b in args[1]:
+            n += len(b)
+        return n
+    if metodo in ("writeto", "readfrom_into"):
+        return len(args[1])
+    if metodo == "readfrom":
+        return args[1]
+    if metodo == "readfrom_mem":
+        return 1 + args[2]
+    if metodo in ("readfrom_mem_into", "writeto_mem"):
+        return 1 + len(args[2])
+    return 0
+
+
+def _mem(addr, memaddr, dados, addrsize):
+    # addrsize é só nomeado em machine.I2C; vai no fim dos args se não for 8
+    if addrsize == 8:
+        return (addr, memaddr, dados)
+    return (addr, memaddr, dados, addrsize)
+
+
+class _SemTrava:
+    def acquire(self, *args):
+        return True
+
+    def release(self):
+        pass
+
+
+class Dispositivo:
+    def __init__(self, barramento, addr, nome, prioridade):
+        self.barramento = barramento
+        self.addr = addr
+        self.nome = nome
+        self.prioridade = prioridade
+        self.zerar()
+
+    def zerar(self):
+        self.transacoes = 0
+        self.bytes = 0
+        self.tempo_us = 0
+
+    # --- mesma interface de machine.I2C ---
+    def writeto(self, addr, buf, stop=True):
+        return self.barramento.fazer(self, "writeto", (addr, buf, stop))
+
+    def writevto(self, addr, bufs, stop=True):
+        return self.barramento.fazer(self, "writevto", (addr, bufs, stop))
+
+    def readfrom(self, addr, n, stop=True):
+        return self.barramento.fazer(self, "readfrom", (addr, n, stop))
+
+    def readfrom_into(self, addr, buf, stop=True):
+        return self.barramento.fazer(self, "readfrom_into", (addr, buf, stop))
+
+    def readfrom_mem(self, addr, memaddr, n, addrsize=8):
+        return self.barramento.fazer(self, "readfrom_mem", _mem(addr, memaddr, n, addrsize))
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        return self.barramento.fazer(self, "readfrom_mem_into", _mem(addr, memaddr, buf, addrsize))
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        return self.barramento.fazer(self, "writeto_mem", _mem(addr, memaddr, buf, addrsize))
+
+    def scan(self):
+        return self.barramento.fazer(self, "scan", ())
+
+    # --- extras ---
+    def pedir(self, metodo, *args, feito=None):
+        # transação que não espera: roda agora ou entra na fila;
+        # feito(resultado) é chamado quando ela roda
+        self.barramento.pedir(self, metodo, args, feito)
+
+    def ceder(self):
+        # deixa passar os pedidos mais urgentes que este dispositivo
+        self.barramento.ceder(self.prioridade)
+
+    def tomar(self):
+        # segura o barramento até largar(), entre várias transações
+        self.barramento.tomar(self)
+
+    def largar(self):
+        self.barramento.largar()
+
+
+class Barramento:
+    def __init__(self, i2c, nome="I2C"):
+        self.i2c = i2c
+        self.nome = nome
+        self.trava = _nova_trava() if _nova_trava else _SemTrava()
+        self.dono = None  # núcleo que está usando o barramento
+        self.nivel = 0    # tomar() sem largar() do dono
+        self.fila = []    # [prioridade, ordem, dispositivo, método, args, feito]
+        self.ordem = 0
+        self.dispositivos = []
+        self.inicio = utime.ticks_us()
+
+    def dispositivo(self, addr, nome=None, prioridade=NORMAL):
+        d = Dispositivo(self, addr, nome or "0x%02x" % addr, prioridade)
+        self.dispositivos.append(d)
+        return d
+
+    def _medir(self, disp, metodo, args):
+        funcao = getattr(self.i2c, metodo)
+        t = utime.ticks_us()
+        if len(args) == 4 and "_mem" in metodo:
+            resultado = funcao(args[0], args[1], args[2], addrsize=args[3])
+        else:
+            resultado = funcao(*args)
+        disp.tempo_us += utime.ticks_diff(utime.ticks_us(), t)
+        disp.transacoes += 1
+        disp.bytes += _tamanho(metodo, args)
+        return resultado
+
+    def tomar(self, disp):
+        eu = _ident()
+        if self.dono == eu:
+            # callback agendado no meio de uma sequência deste núcleo, ou
+            # transação dentro de um tomar() do mesmo núcleo
+            self.nivel += 1
+            return
+        self.trava.acquire()
+        self._assumir(eu, disp)
+
+    def _assumir(self, eu, disp):
+        self.dono = eu
+        self.nivel = 1
+        try:
+            self._drenar(disp.prioridade)  # só os mais urgentes passam na frente
+        except BaseException:
+            self.largar()
+            raise
+
+    def largar(self):
+        self.nivel -= 1
+        if self.nivel:
+            return
+        try:
+            self._drenar(BAIXA + 1)  # o que sobrou na fila, por prioridade
+        finally:
+            self.dono = None
+            self.trava.release()
+
+    def fazer(self, disp, metodo, args):
+        self.tomar(disp)
+        try:
+            return self._medir(disp, metodo, args)
+        finally:
+            self.largar()
+
+    def pedir(self, disp, metodo, args, feito=None):
+        if self.dono is None and self.trava.acquire(0):
+            self._assumir(_ident(), disp)
+            try:
+                resultado = self._medir(disp, metodo, args)
+                if feito is not None:
+                    feito(resultado)
+            finally:
+                self.largar()
+            return
+        self.ordem += 1
+        item = [disp.prioridade, self.ordem, disp, metodo, args, feito]
+        i = len(self.fila)
+        while i and self.fila[i - 1][:2] > item[:2]:
+            i -= 1
+        self.fila.insert(i, item)
+
+    def ceder(self, prioridade):
+        # chamado por quem tem o barramento, entre partes de uma transferência
+        if self.dono == _ident() and self.fila and self.fila[0][0] < prioridade:
+            self._drenar(prioridade)
+
+    def _drenar(self, limite):
+        # roda os pedidos da fila com prioridade < limite; só com a trava
+        while self.fila and self.fila[0][0] < limite:
+            _, _, disp, metodo, args, feito = self.fila.pop(0)
+            try:
+                resultado = self._medir(disp, metodo, args)
+            except OSError as e:
+                print("%s %s: %s" % (self.nome, disp.nome, e))
+                continue
+            if feito is not None:
+                feito(resultado)
+
+    def ocupacao(self):
+        # (dispositivo, fração do tempo desde zerar()) de cada dispositivo
+        total = max(utime.ticks_diff(utime.ticks_us(), self.inicio), 1)
+        return [(d, d.tempo_us / total) for d in self.dispositivos]
+
+    def zerar(self):
+        self.inicio = utime.ticks_us()
+        for d in self.dispositivos:
+            d.zerar()
+
+    def relatorio(self):
+        linhas = [self.nome + ":"]
+        for d, fracao in self.ocupacao():
+            linhas.append("  %s: %d transacoes, %d B, %d us (%d.%d%%)" % (
+                d.nome, d.transacoes, d.bytes, d.tempo_us,
+                int(fracao * 100), int(fracao * 1000) % 10))
+        if self.fila:
+            linhas.append("  %d pedidos na fila" % len(self.fila))
+        return "\n".join(linhas)
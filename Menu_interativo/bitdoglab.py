@@ -1,24 +1,374 @@
+# Suporte à placa BitDogLab
+#
+# Os periféricos são criados no primeiro uso e depois reaproveitados:
+#   import bitdoglab
+#   oled = bitdoglab.oled()       # mesmo objeto em todo o programa
+#   np = bitdoglab.matriz()
+# O módulo continua carregado entre os programas do launcher, então um
+# periférico aberto pelo menu ou por um programa anterior não é recriado.
+# Importar o módulo não abre nada; só o que o programa usa é construído.
+
 from machine import I2C, Timer, Pin
+from micropython import const
+import micropython
+import utime
+
+# Pinos (Banco de Informações de Hardware)
+I2C0_SDA = const(0)      # barramento do chip de carga
+I2C0_SCL = const(1)
+BOTAO_A = const(5)
+BOTAO_B = const(6)
+MATRIZ = const(7)        # WS2812B 5x5
+NUM_LEDS = const(25)
+BUZZER_B = const(10)
+LED_G = const(11)        # LED RGB, catodo comum
+LED_B = const(12)
+LED_R = const(13)
+OLED_SDA = const(14)     # I2C1
+OLED_SCL = const(15)
+BUZZER_A = const(21)     # via transistor
+JOY_SW = const(22)
+JOY_Y = const(26)        # VRy
+JOY_X = const(27)        # VRx
+MICROFONE = const(28)    # nível médio 1,65 V
+
+CARREGADOR = const(107)  # endereço do chip de carga no I2C0
+
+DESLIGAR_MS = 4000  # A + B segurados por este tempo desligam a placa
+REPIQUE_MS = 150    # aperto só conta se o pino estava parado por este tempo
+
+_unicos = {}  # nome -> periférico já construído
+
+
+def i2c0():
+    obj = _unicos.get("i2c0")
+    if obj is None:
+        obj = _unicos["i2c0"] = I2C(0, sda=Pin(I2C0_SDA), scl=Pin(I2C0_SCL), freq=100000)
+    return obj
+
+
+def barramento(n):
+    # gerente do I2C0 (carregador e conector de extensão) ou do I2C1 (OLED);
+    # sensores externos pegam um dispositivo com barramento(0).dispositivo()
+    nome = "barramento%d" % n
+    obj = _unicos.get(nome)
+    if obj is None:
+        if n == 1:
+            oled()  # o I2C1 é escolhido (hardware ou SoftI2C) ao abrir o OLED
+            return _unicos[nome]
+        from barramento import Barramento
+        obj = _unicos[nome] = Barramento(i2c0(), "I2C0")
+    return obj
 
-sdaPIN=Pin(0)
-sclPIN=Pin(1)
-i2c=I2C(0,sda=sdaPIN, scl=sclPIN, freq=100000)
-timer_count = 0 # global variable
-
-def interruption_handler(pin):
-    global timer_count
-    # Configuração dos botões
-    button_a = Pin(5, Pin.IN, Pin.PULL_UP)
-    button_b = Pin(6, Pin.IN, Pin.PULL_UP)
-    if button_a.value() == 0 and button_b.value() == 0:
-        timer_count += 1
+
+def carregador():
+    # chip de carga no I2C0, com prioridade sobre os outros dispositivos
+    obj = _unicos.get("carregador")
+    if obj is None:
+        from barramento import ALTA
+        obj = _unicos["carregador"] = barramento(0).dispositivo(CARREGADOR, "carregador", ALTA)
+    return obj
+
+
+def oled():
+    # SSD1306 128x64 no I2C1 (SoftI2C se o I2C por hardware falhar); o
+    # quadro é enviado em partes de 128 bytes, com prioridade baixa
+    obj = _unicos.get("oled")
+    if obj is None:
+        from ssd1306 import create_display
+        from barramento import Barramento, BAIXA
+        obj = create_display(scl=OLED_SCL, sda=OLED_SDA)
+        bus = _unicos["barramento1"] = Barramento(obj.i2c, "I2C1")
+        obj.set_bus(bus.dispositivo(obj.addr, "oled", BAIXA))
+        _unicos["oled"] = obj
+    return obj
+
+
+def _religar_oled():
+    # refaz o I2C1 do OLED nos GP14/15, com o mesmo clock; um programa que
+    # abriu o próprio I2C ou SoftI2C nesses pinos os tira do barramento
+    obj = _unicos["oled"]
+    if obj.freq:
+        i2c = I2C(1, scl=Pin(OLED_SCL), sda=Pin(OLED_SDA), freq=obj.freq)
     else:
-        timer_count=0     
-    if timer_count == 4:
-        i2c.writeto_mem(107,24,b'2') 
+        from machine import SoftI2C
+        i2c = SoftI2C(scl=Pin(OLED_SCL), sda=Pin(OLED_SDA))
+    _unicos["barramento1"].i2c = i2c
+
+
+def matriz():
+    obj = _unicos.get("matriz")
+    if obj is None:
+        import neopixel
+        obj = _unicos["matriz"] = neopixel.NeoPixel(Pin(MATRIZ), NUM_LEDS)
+    return obj
+
+
+def tocador():
+    # toca as animações .anim na matriz (animacao.Tocador)
+    obj = _unicos.get("tocador")
+    if obj is None:
+        from animacao import Tocador
+        obj = _unicos["tocador"] = Tocador(matriz())
+    return obj
+
+
+def _buzzer(nome, pino):
+    obj = _unicos.get(nome)
+    if obj is None:
+        from machine import PWM
+        obj = _unicos[nome] = PWM(Pin(pino))
+        obj.duty_u16(0)
+    return obj
+
+
+def buzzer_a():
+    return _buzzer("buzzer_a", BUZZER_A)
+
+
+def buzzer_b():
+    return _buzzer("buzzer_b", BUZZER_B)
+
+
+class LedRGB:
+    # os três canais em PWM (r, g, b); cor() recebe valores de 0 a 255
+    def __init__(self):
+        from machine import PWM
+        self.r = PWM(Pin(LED_R))
+        self.g = PWM(Pin(LED_G))
+        self.b = PWM(Pin(LED_B))
+        for canal in (self.r, self.g, self.b):
+            canal.freq(1000)
+            canal.duty_u16(0)
+
+    def cor(self, r, g, b):
+        self.r.duty_u16(r * 257)
+        self.g.duty_u16(g * 257)
+        self.b.duty_u16(b * 257)
+
+    def apagar(self):
+        self.cor(0, 0, 0)
+
+
+def led_rgb():
+    obj = _unicos.get("led_rgb")
+    if obj is None:
+        obj = _unicos["led_rgb"] = LedRGB()
+    return obj
+
+
+class Joystick:
+    # eixos x/y (ADC, 0 a 65535, centro ~32768) e botão sw (Pin, 0 = apertado)
+    def __init__(self):
+        from machine import ADC
+        self.x = ADC(Pin(JOY_X))
+        self.y = ADC(Pin(JOY_Y))
+        self.sw = botao(JOY_SW).pino
+
+    def ler(self):
+        return self.x.read_u16(), self.y.read_u16()
+
+
+def joystick():
+    obj = _unicos.get("joystick")
+    if obj is None:
+        obj = _unicos["joystick"] = Joystick()
+    return obj
+
+
+def microfone():
+    obj = _unicos.get("microfone")
+    if obj is None:
+        from machine import ADC
+        obj = _unicos["microfone"] = ADC(Pin(MICROFONE))
+    return obj
+
+
+def __getattr__(nome):
+    # compatibilidade: `bitdoglab.i2c` era criado ao importar o módulo
+    if nome == "i2c":
+        return i2c0()
+    raise AttributeError(nome)
+
+
+def desligar(_=None):
+    # pede ao chip de carga (endereço 107) para cortar a alimentação
+    carregador().writeto_mem(CARREGADOR, 24, b'2')
+
+
+class Botao:
+    # Um pino de botão com uma única IRQ (o pino só aceita uma), repassada
+    # ao callback `apertou` (borda de descida) e aos acordes que usam o
+    # botão. Use botao(n) para pegar a instância compartilhada.
+    # O repique é filtrado pela última borda, não pelo último aperto: uma
+    # descida só chama `apertou` se o pino não mudou nos REPIQUE_MS
+    # anteriores, então os repiques ao soltar um botão segurado não viram
+    # um segundo aperto.
+    def __init__(self, numero):
+        self.pino = Pin(numero, Pin.IN, Pin.PULL_UP)
+        self.apertou = None
+        self.acordes = []
+        self.borda = utime.ticks_ms()  # ticks_ms da última borda
+        self._irq = self._borda  # método ligado criado uma vez só
+        self.armar()
+
+    def armar(self):
+        # (re)liga a IRQ; um programa pode ter trocado o pino ou a IRQ
+        self.pino.init(Pin.IN, Pin.PULL_UP)
+        self.pino.irq(self._irq, Pin.IRQ_FALLING | Pin.IRQ_RISING)
+
+    def apertado(self):
+        return self.pino.value() == 0
+
+    def _borda(self, pino):
+        agora = utime.ticks_ms()
+        parado = utime.ticks_diff(agora, self.borda)
+        self.borda = agora
+        if self.apertou is not None and pino.value() == 0 and parado > REPIQUE_MS:
+            self.apertou(pino)
+        for acorde in self.acordes:
+            acorde.mudou()
+
+
+_botoes = {}
+
+
+def botao(numero):
+    b = _botoes.get(numero)
+    if b is None:
+        b = _botoes[numero] = Botao(numero)
+    return b
+
+
+class Acorde:
+    # Botões segurados juntos por `segurar_ms` chamam `acao` fora da
+    # interrupção, via micropython.schedule. O tempo é medido com ticks_ms
+    # a partir do último botão apertado e conferido por um Timer de
+    # disparo único; nada é alocado nas interrupções.
+    def __init__(self, numeros, segurar_ms, acao):
+        self.botoes = [botao(n) for n in numeros]
+        self.segurar_ms = segurar_ms
+        self.acao = acao
+        self.ativo = False
+        self.desde = 0
+        self.timer = Timer()
+        self._venceu_cb = self._venceu
+        self._agir_cb = self._agir
+        for b in self.botoes:
+            b.acordes.append(self)
+
+    def todos(self):
+        for b in self.botoes:
+            if not b.apertado():
+                return False
+        return True
+
+    def mudou(self):
+        # chamado pela IRQ de qualquer um dos botões
+        if self.todos():
+            if not self.ativo:
+                self.ativo = True
+                self.desde = utime.ticks_ms()
+                self.timer.init(mode=Timer.ONE_SHOT, period=self.segurar_ms,
+                                callback=self._venceu_cb)
+        elif self.ativo:
+            self.ativo = False
+            self.timer.deinit()
+
+    def segurado_ms(self):
+        return utime.ticks_diff(utime.ticks_ms(), self.desde) if self.ativo else 0
+
+    def _venceu(self, t):
+        if not self.ativo or not self.todos():
+            self.ativo = False
+            return
+        resta = self.segurar_ms - self.segurado_ms()
+        if resta > 0:
+            # o timer disparou antes do tempo medido: espera o que falta
+            self.timer.init(mode=Timer.ONE_SHOT, period=resta, callback=self._venceu_cb)
+            return
+        self.ativo = False
+        try:
+            micropython.schedule(self._agir_cb, None)
+        except RuntimeError:
+            pass  # fila cheia; soltar e apertar de novo repete o pedido
+
+    def _agir(self, _):
+        self.acao()
+
+    def desfazer(self):
+        # tira o acorde dos botões; ele não dispara mais
+        self.ativo = False
+        self.timer.deinit()
+        for b in self.botoes:
+            if self in b.acordes:
+                b.acordes.remove(self)
+
+
+_desligamento = None
+
+
+def acorde_desligar():
+    # acorde A + B de desligar, criado uma vez só
+    global _desligamento
+    if _desligamento is None:
+        _desligamento = Acorde((BOTAO_A, BOTAO_B), DESLIGAR_MS, desligar)
+    return _desligamento
+
 
 class init():
+    # A + B segurados por DESLIGAR_MS desligam a placa
+    def __init__(self):
+        self.acorde = acorde_desligar()
+        # corrente de carga 480mA = 6<<6 (6*80mA deslocado de 6 bits)
+        # (energia.Energia.definir_corrente_carga(480))
+
+
+class Placa:
+    # Periféricos repassados pelo launcher aos programas na variável global
+    # `placa`; são os mesmos objetos únicos das funções deste módulo.
+    # preparar() devolve ao estado inicial o que já foi construído, entre
+    # um programa e outro.
     def __init__(self):
-        soft_timer = Timer(mode=Timer.PERIODIC, period=1000, callback=interruption_handler)
-        # limite de corrente 480mA = 6<<6 (6*80mA deslocado de 6 bits)
-        #i2c.writeto_mem(107,2,b'384')
+        self.energia = None  # energia.Energia, atualizada pelo launcher
+
+    @property
+    def oled(self):
+        return oled()
+
+    @property
+    def matriz(self):
+        return matriz()
+
+    def buzzer(self, pino=BUZZER_A):
+        if pino == BUZZER_A:
+            return buzzer_a()
+        if pino == BUZZER_B:
+            return buzzer_b()
+        raise ValueError("sem buzzer no pino %d" % pino)
+
+    def preparar(self):
+        # tela religada ao I2C1, limpa e sem scroll, LEDs apagados e buzzers
+        # mudos; o acorde de desligar armado por bitdoglab.init() sai junto
+        # com o programa
+        global _desligamento
+        if _desligamento is not None:
+            _desligamento.desfazer()
+            _desligamento = None
+        if "tocador" in _unicos:
+            _unicos["tocador"].parar()
+        if "oled" in _unicos:
+            try:
+                _religar_oled()
+                _unicos["oled"].reset_state()
+            except OSError as e:
+                # sem resposta do OLED; o resto da placa é preparado assim mesmo
+                print("OLED:", e)
+        if "matriz" in _unicos:
+            _unicos["matriz"].fill((0, 0, 0))
+            _unicos["matriz"].write()
+        if "led_rgb" in _unicos:
+            _unicos["led_rgb"].apagar()
+        for nome in ("buzzer_a", "buzzer_b"):
+            if nome in _unicos:
+                _unicos[nome].duty_u16(0)
@@ -0,0 +1,101 @@
+# Cache de bytecode dos programas executados pelo launcher
+#
+# Na primeira execução o fonte é compilado e o código é salvo em
+# /.cache/<caminho>.mpy com marshal (formato .mpy); no nome, "_" vira "_u"
+# e "/" vira "_s", então dois caminhos nunca dão o mesmo arquivo. Nas
+# execuções seguintes, se o tamanho e o mtime do fonte não mudaram, o
+# bytecode é carregado direto, sem compilar e sem manter o texto do
+# programa na RAM.
+#
+# Limitação: salvar objetos de código precisa de marshal.dumps, que só
+# existe em firmwares com MICROPY_PY_MARSHAL e gravação de código
+# persistente. O firmware padrão do rp2 (o da BitDogLab) vem sem isso:
+# lá o cache fica desligado e todo programa é compilado do fonte a cada
+# execução, como antes. Ele funciona nos portes unix/webassembly e em
+# firmwares compilados com essas opções.
+
+import os
+from manifest import normalizar
+
+try:
+    import marshal
+    if not hasattr(marshal, "dumps"):
+        marshal = None
+except ImportError:
+    marshal = None
+
+PASTA = "/.cache"
+
+
+class CodeCache:
+    def __init__(self, pasta=PASTA):
+        self.pasta = pasta
+        self.ativo = marshal is not None
+        if self.ativo:
+            try:
+                os.mkdir(pasta)
+            except OSError:
+                pass  # já existe
+
+    def arquivo(self, path):
+        nome = normalizar(path)[:-3].replace("_", "_u").replace("/", "_s")
+        return self.pasta + "/" + nome + ".mpy"
+
+    def chave(self, path):
+        st = os.stat(path)
+        return st[6].to_bytes(4, "little") + (st[8] & 0xFFFFFFFF).to_bytes(4, "little")
+
+    def do_cache(self, path, chave):
+        # bytecode salvo para esta versão do fonte, ou None
+        if not self.ativo:
+            return None
+        try:
+            with open(self.arquivo(path), "rb") as f:
+                if f.read(8) == chave:
+                    return marshal.loads(f.read())
+        except Exception:
+            pass  # sem cache ou arquivo corrompido: o fonte é compilado
+        return None
+
+    def compilar(self, path, fonte, chave):
+        codigo = compile(fonte, path, "exec")
+        if self.ativo:
+            self._salvar(path, chave, codigo)
+        return codigo
+
+    def carregar(self, path):
+        # retorna (código, "cache" ou "compilado")
+        chave = self.chave(path)
+        codigo = self.do_cache(path, chave)
+        if codigo is not None:
+            return codigo, "cache"
+        with open(path) as f:
+            fonte = f.read()
+        return self.compilar(path, fonte, chave), "compilado"
+
+    def _salvar(self, path, chave, codigo):
+        # qualquer falha só deixa o programa sem cache
+        arquivo = self.arquivo(path)
+        try:
+            dados = marshal.dumps(codigo)
+        except Exception:
+            # sem gravação de código persistente no firmware: não adianta
+            # tentar de novo nos próximos programas
+            self.ativo = False
+            return
+        try:
+            with open(arquivo, "wb") as f:
+                f.write(chave)
+                f.write(dados)
+        except Exception:
+            try:
+                os.remove(arquivo)  # não deixa um arquivo pela metade
+            except OSError:
+                pass
+
+    def limpar(self):
+        try:
+            for nome in os.listdir(self.pasta):
+                os.remove(self.pasta + "/" + nome)
+        except OSError:
+            pass
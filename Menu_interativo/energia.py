@@ -0,0 +1,214 @@
+# Alimentação da placa: chip de carga no I2C0 (endereço 107) e VSYS
+#
+# O chip no endereço 107 (0x6B) com o campo de corrente de carga de 80 mA
+# nos bits 11:6 do registrador 2 é um BQ25620/BQ25622 da TI. Registradores
+# usados aqui:
+#   0x02  corrente de carga (ICHG), 16 bits, bits 11:6, passos de 80 mA
+#         (480 mA = 6 << 6, como no comentário de bitdoglab)
+#   0x06  limite de corrente de entrada (IINDPM), 16 bits, bits 11:4,
+#         passos de 20 mA
+#   0x18  controle: escrever 0x32 (b'2') corta a alimentação (bitdoglab.desligar)
+#   0x1D  Charger_Status_0  (bit 3 IINDPM, bit 2 VINDPM, bit 0 watchdog)
+#   0x1E  Charger_Status_1  (bits 4:3 estado da carga, bits 2:0 VBUS)
+#   0x1F  FAULT_Status_0    (bit 7 VBUS, bit 6 bateria, bit 5 sistema,
+#                            bit 3 temperatura, bits 2:0 NTC)
+# Os registradores de configuração (abaixo de 0x1D) ficam em cache; os de
+# estado, falha e ADC mudam sozinhos e são sempre lidos do chip.
+#
+# Uso:
+#   energia = Energia()
+#   energia.atualizar()          # no máximo uma amostragem por intervalo_ms
+#   energia.estado, energia.falhas, energia.vbus_estado  # do chip de carga
+#   energia.vsys, energia.faixa, energia.porcentagem, energia.usb
+#
+# VSYS vem do ADC(29) (VSYS/3, divisor interno do Pico), com as mesmas
+# faixas do teste de bateria do TestPlaca; usb é a presença de VBUS, pelo
+# pino de detecção do Pico.
+
+from machine import ADC, Pin
+import utime
+
+ENDERECO = 107
+REG_CORRENTE_CARGA = 0x02
+REG_LIMITE_ENTRADA = 0x06
+REG_CONTROLE = 0x18
+REG_STATUS = 0x1D      # Charger_Status_0, _1 e FAULT_Status_0 seguidos
+PRIMEIRO_VOLATIL = 0x1D  # deste em diante nada vai para o cache
+DESLIGAR = 0x32
+
+PASSO_CARGA_MA = 80
+_CAMPO_CARGA = 0x0FC0    # bits 11:6
+PASSO_ENTRADA_MA = 20
+_CAMPO_ENTRADA = 0x0FF0  # bits 11:4
+
+# Charger_Status_1, bits 4:3
+ESTADOS_CARGA = ("Sem carga", "Carregando", "Carga final", "Completando")
+
+# FAULT_Status_0
+FALHA_VBUS = 0x80
+FALHA_BATERIA = 0x40
+FALHA_SISTEMA = 0x20
+FALHA_TEMPERATURA = 0x08
+
+# (VSYS mínimo, estado, porcentagem), da maior tensão para a menor
+FAIXAS = (
+    (4.5, "USB/Fonte", 100),
+    (4.0, "Bat. boa", 90),
+    (3.7, "Bat. media", 60),
+    (3.4, "Bat. baixa", 20),
+    (0.0, "Critico!", 5),
+)
+
+
+class Registradores:
+    # Cache dos registradores do chip. Leituras de vários registradores
+    # seguidos saem numa única transação I2C; escritas atualizam o cache.
+    # Os registradores a partir de `volateis` nunca são guardados.
+    def __init__(self, i2c, addr=ENDERECO, tamanho=64, volateis=PRIMEIRO_VOLATIL):
+        self.i2c = i2c
+        self.addr = addr
+        self.volateis = volateis
+        self.valores = bytearray(tamanho)
+        self.validos = bytearray(tamanho)
+        self._buf = bytearray(tamanho)
+        self.transacoes = 0
+
+    def ler(self, reg, n=1, cache=True):
+        # bytes reg .. reg+n-1 (memoryview sobre o cache)
+        fim = reg + n
+        if cache and fim <= self.volateis and all(self.validos[reg:fim]):
+            return memoryview(self.valores)[reg:fim]
+        buf = memoryview(self._buf)[:n]
+        self.i2c.readfrom_mem_into(self.addr, reg, buf)
+        self.transacoes += 1
+        self.valores[reg:fim] = buf
+        for i in range(reg, min(fim, self.volateis)):
+            self.validos[i] = 1
+        return memoryview(self.valores)[reg:fim]
+
+    def ler_u16(self, reg, cache=True):
+        v = self.ler(reg, 2, cache)
+        return v[0] | v[1] << 8
+
+    def escrever(self, reg, dados):
+        self.i2c.writeto_mem(self.addr, reg, dados)
+        self.transacoes += 1
+        fim = reg + len(dados)
+        self.valores[reg:fim] = dados
+        for i in range(reg, min(fim, self.volateis)):
+            self.validos[i] = 1
+
+    def invalidar(self):
+        for i in range(len(self.validos)):
+            self.validos[i] = 0
+
+
+def _pino_vbus():
+    # Pico W: VBUS passa pelo chip Wi-Fi; Pico: GP24
+    for nome in ("WL_GPIO2", 24):
+        try:
+            return Pin(nome, Pin.IN)
+        except (ValueError, TypeError):
+            pass
+    return None
+
+
+class Energia:
+    def __init__(self, i2c=None, intervalo_ms=2000, amostras=8):
+        if i2c is None:
+            from bitdoglab import carregador
+            i2c = carregador()  # passa pelo gerente do I2C0
+        self.regs = Registradores(i2c)
+        self.intervalo_ms = intervalo_ms
+        self.amostras = amostras
+        try:
+            self.adc = ADC(29)
+        except (ValueError, OSError):
+            self.adc = None
+        self.vbus = _pino_vbus()
+        self.ultima = None
+        self.vsys = None
+        self.faixa = None        # faixa de VSYS, de FAIXAS
+        self.porcentagem = None
+        self.usb = None
+        self.estado = None       # estado da carga, de ESTADOS_CARGA
+        self.vbus_estado = None  # bits 2:0 de Charger_Status_1
+        self.falhas = None       # FAULT_Status_0 (0 = sem falhas)
+        self.status = None       # Charger_Status_0
+
+    def atualizar(self, forcar=False):
+        # relê VSYS e VBUS se a última leitura tem mais de intervalo_ms;
+        # retorna True se leu de novo
+        agora = utime.ticks_ms()
+        if not forcar and self.ultima is not None \
+                and utime.ticks_diff(agora, self.ultima) < self.intervalo_ms:
+            return False
+        self.ultima = agora
+        if self.adc is not None:
+            soma = 0
+            for _ in range(self.amostras):
+                soma += self.adc.read_u16()
+            self.vsys = soma / self.amostras * (3.3 / 65535) * 3
+            for minimo, faixa, pct in FAIXAS:
+                if self.vsys >= minimo:
+                    self.faixa = faixa
+                    self.porcentagem = pct
+                    break
+        if self.vbus is not None:
+            self.usb = self.vbus.value() == 1
+        self.ler_status()
+        return True
+
+    def ler_status(self):
+        # os três registradores de estado e falha numa única leitura
+        try:
+            status = self.regs.ler(REG_STATUS, 3)
+        except OSError:
+            self.estado = self.vbus_estado = self.falhas = self.status = None
+            return False
+        self.status = status[0]
+        self.estado = ESTADOS_CARGA[status[1] >> 3 & 0x03]
+        self.vbus_estado = status[1] & 0x07
+        self.falhas = status[2]
+        return True
+
+    def _campo(self, reg, mascara, deslocamento, passo, cache):
+        # os dois bytes do registrador saem numa única leitura
+        valor = self.regs.ler_u16(reg, cache)
+        return ((valor & mascara) >> deslocamento) * passo
+
+    def _definir_campo(self, reg, mascara, deslocamento, passo, ma):
+        # preserva os bits fora do campo
+        atual = self.regs.ler_u16(reg)
+        campo = (ma // passo) << deslocamento & mascara
+        valor = atual & ~mascara & 0xFFFF | campo
+        self.regs.escrever(reg, bytes((valor & 0xFF, valor >> 8)))
+
+    def limite_entrada_ma(self, cache=True):
+        # corrente máxima puxada do USB
+        return self._campo(REG_LIMITE_ENTRADA, _CAMPO_ENTRADA, 4, PASSO_ENTRADA_MA, cache)
+
+    def definir_limite_entrada(self, ma):
+        self._definir_campo(REG_LIMITE_ENTRADA, _CAMPO_ENTRADA, 4, PASSO_ENTRADA_MA, ma)
+
+    def corrente_carga_ma(self, cache=True):
+        return self._campo(REG_CORRENTE_CARGA, _CAMPO_CARGA, 6, PASSO_CARGA_MA, cache)
+
+    def definir_corrente_carga(self, ma):
+        self._definir_campo(REG_CORRENTE_CARGA, _CAMPO_CARGA, 6, PASSO_CARGA_MA, ma)
+
+    def desligar(self):
+        self.regs.escrever(REG_CONTROLE, bytes((DESLIGAR,)))
+
+    def resumo(self):
+        if self.vsys is None:
+            return "VSYS indisponivel"
+        texto = "VSYS %d.%02dV %s %d%%" % (int(self.vsys), int(self.vsys * 100) % 100,
+                                         self.faixa, self.porcentagem)
+        if self.usb is not None:
+            texto += " USB" if self.usb else " sem USB"
+        if self.estado is not None:
+            texto += " " + self.estado
+        if self.falhas:
+            texto += " falha 0x%02x" % self.falhas
+        return texto
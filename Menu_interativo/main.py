@@ -1,47 +1,85 @@
-from machine import Pin, SoftI2C, ADC
-from ssd1306 import SSD1306_I2C
-import os
+from textcache import TextCache
+from manifest import Manifest
+from codecache import CodeCache
+from memoria import Isolamento
+from prefetch import Prefetch
+import bitdoglab
+from bitdoglab import Placa, botao
+from supervisor import Supervisor
+from energia import Energia
+from pastas import ler_pasta
 import utime
 
-# OLED
-i2c = SoftI2C(scl=Pin(15), sda=Pin(14))
-oled = SSD1306_I2C(128, 64, i2c)
+# OLED (I2C1 por hardware quando possível, SoftI2C como alternativa);
+# é o mesmo objeto que os programas recebem de bitdoglab.oled()
+oled = bitdoglab.oled()
+textos = TextCache()  # título e nomes do menu já renderizados
+# Periféricos repassados aos programas (global `placa`), para que não
+# precisem reabrir e reinicializar o display, a matriz e os buzzers
+placa = Placa()
+
+# Os programas rodam sob o supervisor: A + joystick (SW) segurados voltam ao
+# menu. Serviços como o monitor de bateria continuam rodando durante eles.
+supervisor = Supervisor()
+
+# Os programas leem placa.energia (vsys, faixa, porcentagem, usb, estado e
+# falhas) sem refazer a medição; o serviço só amostra de novo a cada 5 s
+placa.energia = Energia(intervalo_ms=5000)
+supervisor.servico("bateria", 5000, placa.energia.atualizar)
 
 # Joystick
-y_axis = ADC(Pin(26))
-joystick_button = Pin(22, Pin.IN, Pin.PULL_UP)  # SW
+y_axis = bitdoglab.joystick().y
+joystick_button = botao(bitdoglab.JOY_SW)
 
-# Botão B
-button_b = Pin(6, Pin.IN, Pin.PULL_UP)
+# Botão A (atualiza a pasta) e Botão B (abre/executa)
+# (cada pino tem uma só IRQ, compartilhada com acordes como o A + SW de
+# voltar ao menu)
+button_a = botao(bitdoglab.BOTAO_A)
+button_b = botao(bitdoglab.BOTAO_B)
 
 # Estado de navegação
 current_path = "/"
 selecionado = 0
 
-def listar_conteudo(path):
+# Cache de diretórios: path -> entradas (lista ordenada, ou PastaVirtual
+# para pastas grandes, que guarda só a janela em volta da seleção)
+# O loop principal lê sempre do cache; a pasta só é relida do flash ao
+# entrar nela, ao voltar de um programa ou quando o usuário pede (Botão A).
+cache_dirs = {}
+
+# Índice dos programas: a primeira tela sai dele, sem percorrer o flash
+manifesto = Manifest()
+usar_indice = manifesto.carregar()  # enquanto o flash não foi conferido
+indice_conferido = False
+
+def listar_conteudo(path, validar=False):
+    item = cache_dirs.get(path)
+    if item is not None and not validar:
+        return item
+    if item is None and not validar and usar_indice:
+        entradas = manifesto.listar(path)
+        if entradas:
+            cache_dirs[path] = entradas
+            return entradas
     try:
-        itens = os.listdir(path)
-    except:
+        entradas = ler_pasta(path)
+    except OSError:
         return []
-    entradas = []
-    for item in itens:
-        full_path = path + "/" + item if path != "/" else item
-        if os.stat(full_path)[0] & 0x4000:  # é diretório
-            entradas.append((item + "/", True))
-        elif item.endswith(".py"):
-            entradas.append((item, False))
-    return sorted(entradas, key=lambda x: (not x[1], x[0].lower()))
+    if isinstance(item, list) and item == entradas:
+        return item  # nada mudou: a tela não precisa ser redesenhada
+    cache_dirs[path] = entradas
+    return entradas
 
 def desenhar_menu(itens):
     oled.fill(0)
     titulo = "Menu: " + current_path if current_path != "/" else "Menu Principal"
-    oled.text(titulo[:20], 0, 0)
+    textos.text(oled, titulo[:20], 0, 0)
     for i in range(min(4, len(itens))):
         idx = (selecionado + i) % len(itens)
         nome, is_dir = itens[idx]
         prefixo = ">" if i == 0 else " "
         sufixo = "/" if is_dir else ""
-        oled.text(f"{prefixo} {nome[:14]}", 0, 12 + i*10)
+        textos.text(oled, f"{prefixo} {nome[:14]}", 0, 12 + i*10)
     oled.show()
 
 def joystick_cima():
@@ -50,28 +88,151 @@ def joystick_cima():
 def joystick_baixo():
     return y_axis.read_u16() > 60000
 
-def executar_programa(path):
-    oled.fill(0)
-    oled.text("Executando:", 0, 10)
-    oled.text(path[-20:], 0, 25)
-    oled.show()
-    utime.sleep(1)
+# --- Eventos de entrada ---
+# Os botões avisam por interrupção; o joystick é analógico e é lido a cada
+# ENTRADA_MS enquanto o launcher espera, sem redesenhar nada. O tempo ocioso
+# entre leituras é usado para pré-carregar o programa destacado.
+CIMA = 1
+BAIXO = 2
+ABRIR = 3
+VOLTAR = 4
+ATUALIZAR = 5
+
+ENTRADA_MS = 10      # intervalo de leitura do joystick
+REPETIR_MS = 200     # repetição com o joystick mantido inclinado
+ESPERA_REPETIR_MS = 400
+# joystick mantido inclinado: a cada ACELERAR repetições o salto dobra,
+# até SALTO_MAXIMO itens por passo (só faz diferença em pastas grandes)
+ACELERAR = 4
+SALTO_MAXIMO = 16
+
+botao_pendente = 0   # escrito pelas interrupções dos botões
+
+def _botao(evento):
+    global botao_pendente
+    botao_pendente = evento
+
+button_a.apertou = lambda p: _botao(ATUALIZAR)
+button_b.apertou = lambda p: _botao(ABRIR)
+joystick_button.apertou = lambda p: _botao(VOLTAR)
+
+def armar_botoes():
+    # (re)liga as interrupções; um programa executado pode tê-las trocado
+    global botao_pendente
+    button_a.armar()
+    button_b.armar()
+    joystick_button.armar()
+    botao_pendente = 0
+
+direcao = 0          # CIMA/BAIXO enquanto o joystick está inclinado
+proxima_repeticao = 0
+repeticoes = 0       # repetições desde que o joystick foi inclinado
+
+def salto(total):
+    # quantos itens um evento CIMA/BAIXO move, conforme a aceleração
+    n = 1 << min(repeticoes // ACELERAR, 4)
+    return max(1, min(n, SALTO_MAXIMO, total // 8))
+
+def esperar_evento():
+    # bloqueia até um botão ou um movimento do joystick
+    global botao_pendente, direcao, proxima_repeticao, repeticoes
+    while True:
+        agora = utime.ticks_ms()
+        if botao_pendente:
+            # os repiques já foram filtrados na IRQ (bitdoglab.Botao)
+            evento = botao_pendente
+            botao_pendente = 0
+            return evento
+        atual = CIMA if joystick_cima() else BAIXO if joystick_baixo() else 0
+        if atual != direcao:
+            direcao = atual
+            repeticoes = 0
+            if atual:
+                proxima_repeticao = utime.ticks_add(agora, ESPERA_REPETIR_MS)
+                return atual
+        elif atual and utime.ticks_diff(agora, proxima_repeticao) >= 0:
+            proxima_repeticao = utime.ticks_add(agora, REPETIR_MS)
+            repeticoes += 1
+            return atual
+        supervisor.rodar_servicos()
+        manifesto.talvez_salvar()
+        if not prefetch.passo():
+            utime.sleep_ms(ENTRADA_MS)
+
+# Bytecode já compilado dos programas executados
+codigos = CodeCache()
+prefetch = Prefetch(codigos)
+
+def _medir_primeiro_quadro(inicio):
+    # intercepta o primeiro show() do programa no OLED compartilhado para
+    # medir o tempo de abertura; só este objeto é trocado, não a classe
+    def show(full=False):
+        _parar_medicao()
+        print("Primeiro quadro em %d ms" % utime.ticks_diff(utime.ticks_ms(), inicio))
+        oled.show(full)
+
+    oled.show = show
+
+def _parar_medicao():
+    try:
+        del oled.show  # volta a valer o show() da classe
+    except AttributeError:
+        pass
+
+def executar_programa(path, codigo=None):
+    # `codigo` vem do pré-carregamento; sem ele o programa é carregado aqui,
+    # atrás da tela "Executando:"
+    if codigo is None:
+        oled.fill(0)
+        oled.text("Executando:", 0, 10)
+        oled.text(manifesto.titulo(path)[:16], 0, 25)
+        oled.show()
+    manifesto.marcar_execucao(path)  # gravado depois, com o menu parado
+    if codigo is None:
+        utime.sleep(1)
+    inicio = utime.ticks_ms()  # depois da tela "Executando:"
+    _medir_primeiro_quadro(inicio)
+    # módulos importados e objetos deixados pelo programa são liberados ao
+    # sair do with, para o próximo programa começar com o heap limpo
+    iso = Isolamento()
     try:
-        with open(path) as f:
-            exec(f.read(), {})
+        with iso:
+            globais = {"placa": placa, "__file__": path}
+            try:
+                placa.preparar()
+                t = utime.ticks_ms()
+                if codigo is None:
+                    codigo, origem = codigos.carregar(path)
+                else:
+                    origem = "pré-carregado"
+                print("%s: %s em %d ms" % (path, origem, utime.ticks_diff(utime.ticks_ms(), t)))
+                if not supervisor.executar(codigo, globais):
+                    print("%s: interrompido, de volta ao menu" % path)
+            finally:
+                codigo = None
+                globais.clear()
     except Exception as e:
+        _parar_medicao()
         oled.fill(0)
         oled.text("Erro ao executar", 0, 10)
         oled.text(path[-20:], 0, 25)
         oled.text(str(e)[:20], 0, 45)
         oled.show()
         utime.sleep(3)
+    finally:
+        _parar_medicao()
+        placa.preparar()  # o menu volta a ser desenhado do zero
+        if iso.depois:
+            print(iso.relatorio())
 
 # --- Loop principal ---
-ultimo_mov = utime.ticks_ms()
+validar = not usar_indice  # sem índice salvo, a raiz é lida do flash
+desenhado = None           # (pasta, seleção, conteúdo) que está na tela
+armar_botoes()
 
 while True:
-    conteudo = listar_conteudo(current_path)
+    conteudo = listar_conteudo(current_path, validar)
+    validar = False
     if not conteudo:
         oled.fill(0)
         oled.text("Pasta vazia!", 0, 25)
@@ -79,37 +240,59 @@ while True:
         utime.sleep(1)
         current_path = "/"
         selecionado = 0
+        desenhado = None
         continue
+    selecionado %= len(conteudo)  # a pasta pode ter encolhido
 
-    desenhar_menu(conteudo)
-    agora = utime.ticks_ms()
+    # Só redesenha quando algo visível mudou
+    if desenhado is None or desenhado[0] != current_path or desenhado[1] != selecionado \
+            or desenhado[2] is not conteudo:
+        desenhar_menu(conteudo)
+        desenhado = (current_path, selecionado, conteudo)
+        nome, is_dir = conteudo[selecionado]
+        if is_dir:
+            prefetch.cancelar()
+        else:
+            prefetch.alvo(current_path + "/" + nome if current_path != "/" else nome)
+    if not indice_conferido:
+        # a primeira tela já está desenhada; agora o índice confere o flash
+        manifesto.atualizar()
+        manifesto.salvar()
+        indice_conferido = True
+        if usar_indice:
+            usar_indice = False
+            validar = True
+            continue
 
-    # Navegação
-    if joystick_cima() and utime.ticks_diff(agora, ultimo_mov) > 200:
-        selecionado = (selecionado - 1) % len(conteudo)
-        ultimo_mov = agora
+    evento = esperar_evento()
 
-    if joystick_baixo() and utime.ticks_diff(agora, ultimo_mov) > 200:
-        selecionado = (selecionado + 1) % len(conteudo)
-        ultimo_mov = agora
+    # Navegação
+    if evento == CIMA:
+        selecionado = (selecionado - salto(len(conteudo))) % len(conteudo)
+    elif evento == BAIXO:
+        selecionado = (selecionado + salto(len(conteudo))) % len(conteudo)
 
-    # Abrir ou Executar
-    if not button_b.value():
+    # Abrir ou Executar (Botão B)
+    elif evento == ABRIR:
         nome, is_dir = conteudo[selecionado]
         if is_dir:
             current_path = current_path + "/" + nome if current_path != "/" else nome
             selecionado = 0
         else:
             caminho_completo = current_path + "/" + nome if current_path != "/" else nome
-            executar_programa(caminho_completo)
-        utime.sleep(0.3)
+            executar_programa(caminho_completo, prefetch.pegar(caminho_completo))
+            armar_botoes()
+            desenhado = None  # o programa usou a tela
+        validar = True  # pasta nova, ou o programa pode ter criado arquivos
+
+    # Atualizar a pasta (Botão A)
+    elif evento == ATUALIZAR:
+        validar = True
 
     # Voltar com botão do joystick (SW)
-    if not joystick_button.value():
+    elif evento == VOLTAR:
         if current_path != "/":
             partes = current_path.strip("/").split("/")
             current_path = "/" if len(partes) == 1 else "/".join(partes[:-1])
             selecionado = 0
-        utime.sleep(0.3)
-
-    utime.sleep(0.05)
+            validar = True
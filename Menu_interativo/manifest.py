@@ -0,0 +1,169 @@
+# Índice persistente dos programas da placa
+#
+# Guarda em /manifest.json cada .py executável (tamanho, mtime, um título
+# tirado do cabeçalho do arquivo e a hora da última execução) e as pastas,
+# mesmo as que não têm programas. O launcher desenha a primeira tela
+# direto do índice e só depois chama atualizar(), que percorre a árvore e
+# relê o cabeçalho apenas dos arquivos novos ou com tamanho/mtime
+# diferentes.
+#
+# Mudanças pequenas, como a hora de execução, não vão para o flash na
+# hora: talvez_salvar() grava depois de ESPERA_SALVAR_MS sem mudanças.
+
+import json
+import os
+import utime
+
+ARQUIVO = "/manifest.json"
+_TAMANHO = 0
+_MTIME = 1
+_TITULO = 2
+_EXECUCAO = 3
+
+ESPERA_SALVAR_MS = 30000
+
+
+def normalizar(path):
+    # "Jogos//x.py" e "/Jogos/x.py" viram "Jogos/x.py"
+    return "/".join(p for p in path.split("/") if p)
+
+
+def titulo_do_arquivo(path, linhas=12):
+    # primeiro comentário com texto (ignorando linhas de ==== e ----) ou a
+    # primeira linha de uma docstring; senão, o nome do arquivo
+    try:
+        with open(path) as f:
+            for _ in range(linhas):
+                linha = f.readline()
+                if not linha:
+                    break
+                linha = linha.strip()
+                if linha.startswith("#"):
+                    texto = linha.strip("#=-! ").strip()
+                    if texto:
+                        return texto
+                elif linha.startswith('"""') or linha.startswith("'''"):
+                    texto = linha.strip("\"' ")
+                    if texto:
+                        return texto
+                    return f.readline().strip()
+                elif linha:
+                    break
+    except OSError:
+        pass
+    return path.rsplit("/", 1)[-1][:-3]
+
+
+class Manifest:
+    def __init__(self, arquivo=ARQUIVO):
+        self.arquivo = arquivo
+        self.programas = {}  # path -> [tamanho, mtime, título, última execução]
+        self.pastas = set()  # paths de todas as pastas
+        self.alterado = False
+        self.desde = 0  # ticks_ms da última mudança
+
+    def carregar(self):
+        try:
+            with open(self.arquivo) as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = {}
+        if "programas" in dados:
+            self.programas = dados["programas"]
+            self.pastas = set(dados.get("pastas", ()))
+        else:
+            self.programas = dados  # formato antigo, só com os programas
+            self.pastas = set()
+        return bool(self.programas or self.pastas)
+
+    def _mudou(self):
+        self.alterado = True
+        self.desde = utime.ticks_ms()
+
+    def salvar(self):
+        if not self.alterado:
+            return
+        try:
+            with open(self.arquivo, "w") as f:
+                json.dump({"programas": self.programas, "pastas": list(self.pastas)}, f)
+            self.alterado = False
+        except OSError:
+            pass  # sistema de arquivos cheio ou só leitura: fica em RAM
+
+    def talvez_salvar(self, espera_ms=ESPERA_SALVAR_MS):
+        # grava só depois de espera_ms sem mudanças
+        if self.alterado and utime.ticks_diff(utime.ticks_ms(), self.desde) >= espera_ms:
+            self.salvar()
+
+    def atualizar(self, raiz="/"):
+        # percorre a árvore; retorna quantos programas foram (re)lidos
+        vistos = set()
+        pastas = set()
+        lidos = self._varrer(raiz, vistos, pastas)
+        for path in list(self.programas):
+            if path not in vistos:
+                del self.programas[path]
+                self._mudou()
+        if pastas != self.pastas:
+            self.pastas = pastas
+            self._mudou()
+        return lidos
+
+    def _varrer(self, pasta, vistos, pastas):
+        lidos = 0
+        try:
+            itens = list(os.ilistdir(pasta))
+        except OSError:
+            return 0
+        for item in itens:
+            nome = item[0]
+            if nome.startswith("."):
+                continue
+            path = normalizar(pasta + "/" + nome)
+            if item[1] & 0x4000:
+                pastas.add(path)
+                lidos += self._varrer("/" + path, vistos, pastas)
+                continue
+            if not nome.endswith(".py"):
+                continue
+            st = os.stat("/" + path)
+            vistos.add(path)
+            antigo = self.programas.get(path)
+            if antigo and antigo[_TAMANHO] == st[6] and antigo[_MTIME] == st[8]:
+                continue
+            execucao = antigo[_EXECUCAO] if antigo else 0
+            self.programas[path] = [st[6], st[8], titulo_do_arquivo("/" + path), execucao]
+            self._mudou()
+            lidos += 1
+        return lidos
+
+    def listar(self, pasta):
+        # entradas (nome, é_pasta) de uma pasta, no formato do launcher
+        prefixo = normalizar(pasta)
+        if prefixo:
+            prefixo += "/"
+        pastas = set()
+        for path in self.pastas:
+            if path.startswith(prefixo) and "/" not in path[len(prefixo):]:
+                pastas.add(path[len(prefixo):] + "/")
+        arquivos = []
+        for path in self.programas:
+            if not path.startswith(prefixo):
+                continue
+            resto = path[len(prefixo):]
+            if "/" in resto:
+                pastas.add(resto.split("/", 1)[0] + "/")
+            else:
+                arquivos.append(resto)
+        entradas = [(p, True) for p in pastas] + [(a, False) for a in arquivos]
+        return sorted(entradas, key=lambda x: (not x[1], x[0].lower()))
+
+    def titulo(self, path):
+        info = self.programas.get(normalizar(path))
+        return info[_TITULO] if info else normalizar(path)
+
+    def marcar_execucao(self, path):
+        info = self.programas.get(normalizar(path))
+        if info:
+            info[_EXECUCAO] = utime.time()
+            self._mudou()
@@ -0,0 +1,70 @@
+# Medição e limpeza do heap entre programas do launcher
+#
+# Uso:
+#   with Isolamento() as iso:
+#       exec(codigo, globais)
+#   print(iso.relatorio())
+#
+# Ao sair, os módulos importados pelo programa são tirados de sys.modules,
+# o coletor roda e o heap é medido de novo (memória livre e maior bloco
+# contíguo, que é o que decide se um bytearray grande ainda cabe).
+
+import gc
+import sys
+
+
+def maior_bloco():
+    # maior bytearray que ainda pode ser alocado (busca binária)
+    gc.collect()
+    baixo = 0
+    alto = gc.mem_free()
+    while baixo < alto:
+        meio = (baixo + alto + 1) // 2
+        try:
+            bloco = bytearray(meio)
+            del bloco
+            baixo = meio
+        except MemoryError:
+            alto = meio - 1
+    gc.collect()
+    return baixo
+
+
+def estado():
+    # (memória livre, maior bloco) depois de uma coleta
+    gc.collect()
+    return gc.mem_free(), maior_bloco()
+
+
+class Isolamento:
+    def __init__(self, medir=True):
+        self.medir = medir
+        self.modulos = None
+        self.antes = None
+        self.depois = None
+        self.descarregados = []
+
+    def __enter__(self):
+        self.modulos = set(sys.modules)
+        if self.medir:
+            self.antes = estado()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        for nome in list(sys.modules):
+            if nome not in self.modulos:
+                del sys.modules[nome]
+                self.descarregados.append(nome)
+        self.modulos = None
+        gc.collect()
+        if self.medir:
+            self.depois = estado()
+        return False  # exceções do programa seguem para quem chamou
+
+    def relatorio(self):
+        texto = "Heap: livre %d -> %d B, maior bloco %d -> %d B" % (
+            self.antes[0], self.depois[0], self.antes[1], self.depois[1]
+        )
+        if self.descarregados:
+            texto += ", descarregados: " + " ".join(self.descarregados)
+        return texto
@@ -0,0 +1,122 @@
+# Quadros para a matriz 5x5 de LEDs endereçáveis (WS2812B no GP7)
+#
+# O quadro é o próprio buffer do NeoPixel (75 bytes, 3 por LED na ordem
+# do driver, GRB). As coordenadas passam por uma tabela (x, y) -> posição
+# no buffer, com variantes de rotação e espelho, e as cores por uma tabela
+# de 256 entradas com brilho e gama. Desenhar um quadro só escreve bytes:
+# nada é alocado e não há contas com float por LED.
+#
+#   q = Quadro(brilho=40)
+#   q.limpar()
+#   q.pixel(0, 0, 255, 0, 0)   # canto superior esquerdo
+#   q.mostrar()
+#
+# A fiação é em serpentina: o LED 0 fica no canto inferior direito e as
+# linhas alternam de sentido.
+
+from micropython import const
+
+LARGURA = const(5)
+ALTURA = const(5)
+NUM_LEDS = const(25)
+_BYTES = const(75)
+
+_APAGADO = bytes(_BYTES)
+
+
+def indice(x, y):
+    # LED da posição (x, y), com (0, 0) no canto superior esquerdo
+    linha = ALTURA - 1 - y
+    if linha % 2 == 0:
+        return linha * LARGURA + LARGURA - 1 - x
+    return linha * LARGURA + x
+
+
+def matriz_led():
+    # a mesma tabela LED_MATRIX[y][x] que os programas da placa usavam
+    return [[indice(x, y) for x in range(LARGURA)] for y in range(ALTURA)]
+
+
+def tabela_xy(rotacao=0, espelho=False):
+    # bytes[y * 5 + x] = posição do LED no buffer (3 * índice); rotacao em
+    # graus no sentido horário (0, 90, 180, 270), espelho inverte o eixo x
+    # antes de girar
+    tabela = bytearray(NUM_LEDS)
+    for y in range(ALTURA):
+        for x in range(LARGURA):
+            xs = LARGURA - 1 - x if espelho else x
+            if rotacao == 90:
+                px, py = LARGURA - 1 - y, xs
+            elif rotacao == 180:
+                px, py = LARGURA - 1 - xs, ALTURA - 1 - y
+            elif rotacao == 270:
+                px, py = y, ALTURA - 1 - xs
+            else:
+                px, py = xs, y
+            tabela[y * LARGURA + x] = 3 * indice(px, py)
+    return bytes(tabela)
+
+
+def tabela_brilho(brilho=255, gama=2.2):
+    # bytes[v] = valor enviado ao LED para a componente v (0..255), já com
+    # a correção de gama e o brilho máximo `brilho`
+    tabela = bytearray(256)
+    for v in range(256):
+        if gama == 1:
+            tabela[v] = v * brilho // 255
+        else:
+            tabela[v] = int((v / 255) ** gama * brilho + 0.5)
+    return bytes(tabela)
+
+
+class Quadro:
+    def __init__(self, np=None, rotacao=0, espelho=False, brilho=255, gama=2.2):
+        if np is None:
+            from bitdoglab import matriz
+            np = matriz()
+        self.np = np
+        self.buf = np.buf
+        ordem = np.ORDER  # posição de r, g, b dentro dos 3 bytes de um LED
+        self._r = ordem[0]
+        self._g = ordem[1]
+        self._b = ordem[2]
+        self.xy = tabela_xy(rotacao, espelho)
+        self.lut = tabela_brilho(brilho, gama)
+
+    def orientar(self, rotacao=0, espelho=False):
+        self.xy = tabela_xy(rotacao, espelho)
+
+    def ajustar(self, brilho=255, gama=2.2):
+        self.lut = tabela_brilho(brilho, gama)
+
+    def pixel(self, x, y, r, g, b):
+        if 0 <= x < LARGURA and 0 <= y < ALTURA:
+            self.led_bruto(self.xy[y * LARGURA + x], r, g, b)
+
+    def led(self, i, r, g, b):
+        # pelo índice físico (0..24), como np[i]
+        self.led_bruto(3 * i, r, g, b)
+
+    def led_bruto(self, pos, r, g, b):
+        lut = self.lut
+        buf = self.buf
+        buf[pos + self._r] = lut[r]
+        buf[pos + self._g] = lut[g]
+        buf[pos + self._b] = lut[b]
+
+    def preencher(self, r, g, b):
+        lut = self.lut
+        buf = self.buf
+        vr = lut[r]
+        vg = lut[g]
+        vb = lut[b]
+        for pos in range(0, _BYTES, 3):
+            buf[pos + self._r] = vr
+            buf[pos + self._g] = vg
+            buf[pos + self._b] = vb
+
+    def limpar(self):
+        self.buf[:] = _APAGADO
+
+    def mostrar(self):
+        self.np.write()
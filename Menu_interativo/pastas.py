@@ -0,0 +1,132 @@
+# Listagem das pastas para o menu do launcher
+#
+# As entradas vêm de os.ilistdir, que já informa se cada item é pasta ou
+# arquivo, sem um os.stat por item. Pastas pequenas viram uma lista
+# ordenada (pastas primeiro, nomes sem diferenciar maiúsculas). Pastas com
+# mais de LIMITE entradas viram uma PastaVirtual: só o total é contado e
+# apenas uma janela em volta da seleção fica na memória. Cada leitura da
+# pasta é uma única passada de ilistdir.
+
+import os
+
+LIMITE = 48    # acima disso a pasta é virtual
+JANELA = 16    # entradas materializadas de cada vez
+RECUO = 3      # entradas mantidas antes do ponto pedido (lado de onde veio)
+CABECA = 4     # primeiras entradas, sempre guardadas (volta do fim ao início)
+
+
+def entradas(path, pastas=None):
+    # gera (nome, é_pasta) das pastas e .py, sem itens ocultos; pastas=True
+    # ou False restringe a um dos tipos
+    for item in os.ilistdir(path):
+        nome = item[0]
+        if nome.startswith("."):
+            continue  # pastas internas, como o cache de bytecode
+        is_dir = item[1] & 0x4000 != 0
+        if pastas is not None and is_dir != pastas:
+            continue
+        if is_dir:
+            yield (nome + "/", True)
+        elif nome.endswith(".py"):
+            yield (nome, False)
+
+
+def ler_pasta(path, limite=LIMITE):
+    # lista ordenada, ou PastaVirtual se a pasta passar de `limite`; a
+    # pasta é percorrida uma vez só, mesmo quando vira virtual
+    itens = entradas(path)
+    lista = []
+    for entrada in itens:
+        lista.append(entrada)
+        if len(lista) > limite:
+            return PastaVirtual(path, lista, itens)
+    lista.sort(key=lambda x: (not x[1], x[0].lower()))
+    return lista
+
+
+class PastaVirtual:
+    # Sequência somente leitura com len() e [i], como a lista das pastas
+    # pequenas. A ordem é a do sistema de arquivos (o LittleFS já devolve
+    # os nomes em ordem), com as pastas antes dos arquivos. Pedir um índice
+    # fora da janela relê a pasta em streaming e guarda só a nova janela.
+    # Se a pasta encolheu desde a contagem, o índice é ajustado ao novo
+    # tamanho em vez de dar IndexError.
+    def __init__(self, path, lidas=(), resto=None):
+        # lidas e resto: o que ler_pasta já leu e o gerador com o restante
+        self.path = path
+        self.ultimo = 0
+        self.leituras = 0  # quantas vezes a pasta foi relida
+        self._contar(lidas, resto)
+
+    def _contar(self, lidas=(), resto=None):
+        # uma passada conta pastas e arquivos e guarda as primeiras
+        # entradas de cada tipo, que dão a cabeça e a primeira janela
+        if resto is None:
+            resto = entradas(self.path)
+        guardar = CABECA + JANELA
+        pastas = []
+        arquivos = []
+        self.pastas = 0
+        self.total = 0
+        for fonte in (lidas, resto):
+            for entrada in fonte:
+                self.total += 1
+                if entrada[1]:
+                    self.pastas += 1
+                    if len(pastas) < guardar:
+                        pastas.append(entrada)
+                elif len(arquivos) < guardar:
+                    arquivos.append(entrada)
+        primeiras = (pastas + arquivos)[:guardar]
+        self.cabeca = primeiras[:CABECA]
+        self.janela = primeiras[CABECA:]
+        self.inicio = CABECA
+        self.leituras += 1
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.total
+        for _ in range(2):
+            if not self.total:
+                raise IndexError(i)
+            i = max(0, min(i, self.total - 1))  # o total pode estar velho
+            if i < len(self.cabeca):
+                return self.cabeca[i]
+            if not self.inicio <= i < self.inicio + len(self.janela):
+                self._carregar(i)
+            if self.inicio <= i < self.inicio + len(self.janela):
+                self.ultimo = i
+                return self.janela[i - self.inicio]
+            self._contar()  # a pasta mudou: conta de novo
+        raise IndexError(i)
+
+    def _carregar(self, i):
+        # a janela se estende no sentido do movimento
+        if i >= self.ultimo:
+            inicio = i - RECUO
+        else:
+            inicio = i - JANELA + 1 + RECUO
+        inicio = max(0, min(inicio, self.total - JANELA))
+        fim = inicio + JANELA
+        self.janela = []  # libera a janela antiga antes de ler
+        self.inicio = inicio
+        pastas = []
+        arquivos = []
+        p = 0
+        a = self.pastas  # posição do próximo arquivo
+        for entrada in entradas(self.path):
+            if entrada[1]:
+                if inicio <= p < fim:
+                    pastas.append(entrada)
+                p += 1
+            else:
+                if inicio <= a < fim:
+                    arquivos.append(entrada)
+                a += 1
+            if len(pastas) + len(arquivos) >= fim - inicio:
+                break
+        self.janela = pastas + arquivos
+        self.leituras += 1
@@ -0,0 +1,145 @@
+# Pré-carregamento do programa destacado no launcher
+#
+# Enquanto o usuário para sobre um arquivo, o launcher chama passo() nos
+# intervalos de leitura do joystick. Cada passo faz um pedaço pequeno do
+# trabalho: carregar o bytecode do cache, ou ler o fonte em blocos e
+# compilar, e importar as bibliotecas que o programa usa. Ao apertar B o
+# código já está pronto e o programa abre sem a tela de espera.
+#
+# Mudar a seleção chama alvo() com outro arquivo (ou cancelar()) e o que
+# foi feito é descartado. Arquivos grandes demais ou pouca memória livre
+# fazem o pré-carregamento desistir; o programa é então carregado na hora,
+# como antes.
+
+import gc
+import os
+import utime
+
+OCIOSO_MS = 300       # espera parado sobre o item antes de começar
+BLOCO = 1024          # bytes lidos do fonte por passo
+
+# bibliotecas da placa que vale a pena deixar importadas; outros módulos
+# do programa não são tocados, porque importar pode ter efeitos colaterais.
+# São importadas fora do supervisor, então uma espera nelas tem de buscar
+# utime na hora da chamada (como widgets.Screen.sleep_ms), senão não
+# passa pelo atalho de volta ao menu
+MODULOS = ("ssd1306", "framebuf", "neopixel", "widgets", "textcache")
+
+_ESPERA = 0
+_CACHE = 1
+_LER = 2
+_COMPILAR = 3
+_MODULOS = 4
+_PRONTO = 5
+_DESISTIU = 6
+
+
+class Prefetch:
+    def __init__(self, codigos, limite_bytes=16384, livre_minimo=40000):
+        self.codigos = codigos
+        self.limite_bytes = limite_bytes
+        self.livre_minimo = livre_minimo
+        self.path = None
+        self.cancelar()
+
+    def cancelar(self):
+        self.path = None
+        self.etapa = _DESISTIU
+        self.codigo = None
+        self.chave = None
+        self._arquivo_fechar()
+        self.partes = []
+        self.modulos = []
+
+    def alvo(self, path):
+        # novo item destacado; recomeça só se for outro arquivo
+        if path == self.path:
+            return
+        self.cancelar()
+        self.path = path
+        self.etapa = _ESPERA
+        self.desde = utime.ticks_ms()
+
+    def pegar(self, path):
+        # código pronto para `path`, ou None; o estado é liberado
+        codigo = None
+        if path == self.path and self.etapa in (_MODULOS, _PRONTO):
+            codigo = self.codigo
+        self.cancelar()
+        return codigo
+
+    def _arquivo_fechar(self):
+        arquivo = getattr(self, "arquivo", None)
+        if arquivo is not None:
+            arquivo.close()
+        self.arquivo = None
+
+    def _desistir(self):
+        path = self.path
+        self.cancelar()
+        self.path = path  # não tenta de novo enquanto o item não mudar
+
+    def passo(self):
+        # faz uma etapa curta; retorna False quando não há nada a fazer
+        etapa = self.etapa
+        if etapa >= _PRONTO:
+            return False
+        try:
+            if etapa == _ESPERA:
+                if utime.ticks_diff(utime.ticks_ms(), self.desde) < OCIOSO_MS:
+                    return False
+                self.etapa = _CACHE
+            elif etapa == _CACHE:
+                self.chave = self.codigos.chave(self.path)
+                self.codigo = self.codigos.do_cache(self.path, self.chave)
+                if self.codigo is not None:
+                    self._listar_modulos()
+                    self.etapa = _MODULOS
+                elif os.stat(self.path)[6] > self.limite_bytes or gc.mem_free() < self.livre_minimo:
+                    self._desistir()
+                else:
+                    self.arquivo = open(self.path)
+                    self.etapa = _LER
+            elif etapa == _LER:
+                bloco = self.arquivo.read(BLOCO)
+                if bloco:
+                    self.partes.append(bloco)
+                else:
+                    self._arquivo_fechar()
+                    self.etapa = _COMPILAR
+            elif etapa == _COMPILAR:
+                fonte = "".join(self.partes)
+                self.partes = []
+                self.modulos = _importados(fonte.split("\n", 60)[:60])
+                self.codigo = self.codigos.compilar(self.path, fonte, self.chave)
+                self.etapa = _MODULOS
+            elif etapa == _MODULOS:
+                if self.modulos:
+                    __import__(self.modulos.pop())
+                else:
+                    self.etapa = _PRONTO
+        except Exception:
+            # erro de leitura ou de sintaxe aparece quando o programa for
+            # executado de verdade
+            self._desistir()
+        return True
+
+    def _listar_modulos(self):
+        try:
+            with open(self.path) as f:
+                linhas = [f.readline() for _ in range(60)]
+        except OSError:
+            linhas = []
+        self.modulos = _importados(linhas)
+
+
+def _importados(linhas):
+    # bibliotecas de MODULOS citadas em "import x" / "from x import y"
+    modulos = []
+    for linha in linhas:
+        partes = linha.split()
+        if len(partes) >= 2 and partes[0] in ("import", "from"):
+            nome = partes[1].rstrip(",")
+            if nome in MODULOS and nome not in modulos:
+                modulos.append(nome)
+    return modulos
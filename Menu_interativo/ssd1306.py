@@ -2,6 +2,7 @@
 
 from micropython import const
 import framebuf
+import time
 
 
 # register definitions
@@ -22,21 +23,105 @@ SET_DISP_CLK_DIV = const(0xD5)
 SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
+SET_HWSCROLL_RIGHT = const(0x26)
+SET_HWSCROLL_LEFT = const(0x27)
+SET_HWSCROLL_VR = const(0x29)
+SET_HWSCROLL_VL = const(0x2A)
+SET_HWSCROLL_OFF = const(0x2E)
+SET_HWSCROLL_ON = const(0x2F)
+SET_VSCROLL_AREA = const(0xA3)
+
+# scroll step interval in frames -> value of the interval field
+_SCROLL_FRAMES = {5: 0, 64: 1, 128: 2, 256: 3, 3: 4, 4: 5, 25: 6, 2: 7}
+
+# per-window cost of a partial flush (address commands plus the data
+# transaction header), used to decide when a full frame is cheaper
+_WINDOW_OVERHEAD = const(12)
+
+
+def _asyncio():
+    # only programs that use show_async() pay for loading asyncio
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
+
+class BusStats:
+    # Counters kept by a display after enable_stats(). Bytes are payload
+    # bytes handed to the bus, including I2C control bytes.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.transactions = 0
+        self.bytes = 0
+        self.frames = 0
+        self.pixel_bytes = 0  # frame buffer bytes sent by show()
+        self.show_us = 0
+        self.max_show_us = 0
+        self.start = time.ticks_ms()
+
+    def add(self, nbytes):
+        self.transactions += 1
+        self.bytes += nbytes
+
+    def frame(self, us, nbytes):
+        self.frames += 1
+        self.pixel_bytes += nbytes
+        self.show_us += us
+        if us > self.max_show_us:
+            self.max_show_us = us
+
+    def fps(self):
+        elapsed = time.ticks_diff(time.ticks_ms(), self.start)
+        return self.frames * 1000 / elapsed if elapsed > 0 else 0
+
+    def summary(self):
+        frames = self.frames or 1
+        return "%d frames %.1f fps | %d tx %d B (%d B/frame) | show %d us avg %d us max" % (
+            self.frames,
+            self.fps(),
+            self.transactions,
+            self.bytes,
+            self.bytes // frames,
+            self.show_us // frames,
+            self.max_show_us,
+        )
+
 
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
-    def __init__(self, width, height, external_vcc):
+    def __init__(self, width, height, external_vcc, warm=False):
         self.width = width
         self.height = height
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        # copy of the frame last sent to the controller; show() compares
+        # against it and only sends the pages and columns that changed
+        self.shadow = bytearray(len(self.buffer))
+        self.synced = False
+        self.flushed = 0  # data bytes sent by the last show()
+        self._mv = memoryview(self.buffer)
+        self._window = bytearray(6)
+        self.back = None  # frame being sent by show_async(), allocated on first use
+        self.flushing = False
+        self.scrolling = None  # (right, start_page, end_page, dy, top, rows)
+        self.stats = None  # BusStats while enable_stats() is in effect
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
-        self.init_display()
+        if warm:
+            # the controller was already configured (e.g. by the launcher):
+            # skip the full init and just undo what a previous user may
+            # have left behind
+            self.reset_state()
+        else:
+            self.init_display()
 
     def init_display(self):
-        for cmd in (
+        self.write_cmds(bytes((
             SET_DISP | 0x00,  # off
             # address setting
             SET_MEM_ADDR,
@@ -66,12 +151,29 @@ class SSD1306(framebuf.FrameBuffer):
             # charge pump
             SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+            SET_DISP | 0x01,  # on
+        )))
         self.fill(0)
         self.show()
 
+    def reset_state(self):
+        # scrolling off, normal video, full contrast, horizontal addressing
+        # and display on, as init_display() leaves it; the buffer is cleared
+        # and the next show() sends a full frame
+        self.scrolling = None
+        self.write_cmds(bytes((
+            SET_HWSCROLL_OFF,
+            SET_MEM_ADDR,
+            0x00,
+            SET_DISP_START_LINE | 0x00,
+            SET_CONTRAST,
+            0xFF,
+            SET_NORM_INV,
+            SET_DISP | 0x01,
+        )))
+        self.fill(0)
+        self.synced = False
+
     def poweroff(self):
         self.write_cmd(SET_DISP | 0x00)
 
@@ -79,77 +181,405 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_DISP | 0x01)
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.write_cmds(bytes((SET_CONTRAST, contrast)))
 
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def enable_stats(self, enable=True):
+        self.stats = BusStats() if enable else None
+        return self.stats
+
+    def invalidate(self):
+        # forget what the controller holds; the next show() sends a full frame
+        self.synced = False
+
+    def hw_scroll_h(self, right=True, start_page=0, end_page=None, frames=2):
+        # the controller moves the pages start_page..end_page one column
+        # every `frames` frames, wrapping around, with no further bus traffic
+        if end_page is None:
+            end_page = self.pages - 1
+        self.hw_scroll_off()
+        self.write_cmds(bytes((
+            SET_HWSCROLL_RIGHT if right else SET_HWSCROLL_LEFT,
+            0x00,
+            start_page,
+            _SCROLL_FRAMES[frames],
+            end_page,
+            0x00,
+            0xFF,
+            SET_HWSCROLL_ON,
+        )))
+        self.scrolling = (right, start_page, end_page, 0, 0, self.height)
+
+    def hw_scroll_diag(self, right=True, start_page=0, end_page=None, frames=2,
+                       dy=1, top=0, rows=None):
+        # horizontal scroll of start_page..end_page combined with a vertical
+        # scroll of dy rows per step inside the rows top..top+rows-1
+        if end_page is None:
+            end_page = self.pages - 1
+        if rows is None:
+            rows = self.height - top
+        self.hw_scroll_off()
+        self.write_cmds(bytes((
+            SET_VSCROLL_AREA,
+            top,
+            rows,
+            SET_HWSCROLL_VR if right else SET_HWSCROLL_VL,
+            0x00,
+            start_page,
+            _SCROLL_FRAMES[frames],
+            end_page,
+            dy,
+            SET_HWSCROLL_ON,
+        )))
+        self.scrolling = (right, start_page, end_page, dy, top, rows)
+
+    def hw_scroll_off(self, steps=0):
+        # Stops a hardware scroll. The controller leaves its RAM in the
+        # scrolled state and needs it rewritten, so the next show() sends a
+        # full frame; pass the number of steps that ran to have the buffer
+        # moved to match first (see scroll_sync).
+        if self.scrolling is None:
+            return
+        self.write_cmd(SET_HWSCROLL_OFF)
+        if steps:
+            self.scroll_sync(steps)
+        self.scrolling = None
+        self.invalidate()
+
+    def scroll_sync(self, steps):
+        # apply `steps` steps of the active hardware scroll to self.buffer
+        right, p0, p1, dy, top, rows = self.scrolling
+        width = self.width
+        dx = steps % width
+        if dx:
+            if not right:
+                dx = width - dx
+            for page in range(p0, p1 + 1):
+                start = page * width
+                row = self.buffer[start : start + width]
+                self.buffer[start : start + dx] = row[width - dx :]
+                self.buffer[start + dx : start + width] = row[: width - dx]
+        dy = dy * steps % rows if rows else 0
+        if dy:
+            # rotate every column upwards by dy rows inside the scroll area
+            buf = self.buffer
+            mask = ((1 << rows) - 1) << top
+            for x in range(width):
+                col = 0
+                for page in range(self.pages):
+                    col |= buf[page * width + x] << (page * 8)
+                area = (col & mask) >> top
+                area = ((area >> dy) | (area << (rows - dy))) & ((1 << rows) - 1)
+                col = (col & ~mask) | (area << top)
+                for page in range(self.pages):
+                    buf[page * width + x] = (col >> (page * 8)) & 0xFF
+
+    def show(self, full=False):
+        stats = self.stats
+        if stats is None:
+            self._show(full)
+            return
+        start = time.ticks_us()
+        self._show(full)
+        stats.frame(time.ticks_diff(time.ticks_us(), start), self.flushed)
+
+    def _show(self, full):
+        if self.scrolling is not None:
+            # RAM writes are not allowed while the controller is scrolling
+            self.hw_scroll_off()
+        if full or not self.synced:
+            self._write_window(0, self.width - 1, 0, self.pages - 1, self.buffer)
+            self.shadow[:] = self.buffer
+            self.synced = True
+            self.flushed = len(self.buffer)
+            return
+        spans = []
+        cost = 0
+        for page in range(self.pages):
+            span = self._dirty_span(page, self.buffer)
+            if span is not None:
+                spans.append(span)
+                cost += span[2] - span[1] + 1 + _WINDOW_OVERHEAD
+        if cost >= len(self.buffer):
+            self._show(True)
+            return
+        sent = 0
+        for page, x0, x1 in spans:
+            start = page * self.width
+            data = self._mv[start + x0 : start + x1 + 1]
+            self._write_window(x0, x1, page, page, data)
+            self.shadow[start + x0 : start + x1 + 1] = data
+            sent += x1 - x0 + 1
+        self.flushed = sent
+
+    async def show_async(self):
+        # Double-buffered flush: waits only for the previous frame to leave,
+        # takes a copy of self.buffer and sends it one page at a time in a
+        # background task, yielding to the event loop between pages. The
+        # caller may start drawing the next frame as soon as this returns.
+        asyncio = _asyncio()
+        while self.flushing:
+            await asyncio.sleep(0)
+        if self.back is None:
+            self.back = bytearray(len(self.buffer))
+        self.back[:] = self.buffer
+        self.flushing = True
+        try:
+            asyncio.create_task(self._flush_back())
+        except BaseException:
+            self.flushing = False
+            raise
+
+    async def wait_flush(self):
+        # returns once the frame handed to show_async() is on the display
+        asyncio = _asyncio()
+        while self.flushing:
+            await asyncio.sleep(0)
+
+    async def _flush_back(self):
+        # everything runs inside the try so an error can't leave flushing set
+        try:
+            self.flushing = True
+            asyncio = _asyncio()
+            if self.scrolling is not None:
+                # RAM writes are not allowed while the controller is scrolling
+                self.hw_scroll_off()
+            back = self.back
+            mv = memoryview(back)
+            full = not self.synced
+            sent = 0
+            start = time.ticks_us()
+            for page in range(self.pages):
+                base = page * self.width
+                if full:
+                    span = (page, 0, self.width - 1)
+                else:
+                    span = self._dirty_span(page, back)
+                if span is not None:
+                    x0 = span[1]
+                    x1 = span[2]
+                    data = mv[base + x0 : base + x1 + 1]
+                    self._write_window(x0, x1, page, page, data)
+                    self.shadow[base + x0 : base + x1 + 1] = data
+                    sent += x1 - x0 + 1
+                await asyncio.sleep(0)
+            self.synced = True
+            self.flushed = sent
+            if self.stats is not None:
+                self.stats.frame(time.ticks_diff(time.ticks_us(), start), sent)
+        finally:
+            self.flushing = False
+
+    def _dirty_span(self, page, buf):
+        # first and last column of a page that differ from the shadow copy
+        shadow = self.shadow
+        start = page * self.width
+        end = start + self.width
+        x0 = start
+        while x0 < end and buf[x0] == shadow[x0]:
+            x0 += 1
+        if x0 == end:
+            return None
+        x1 = end - 1
+        while buf[x1] == shadow[x1]:
+            x1 -= 1
+        return page, x0 - start, x1 - start
+
+    def _write_window(self, x0, x1, p0, p1, data):
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
             x0 += 32
             x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        window = self._window
+        window[0] = SET_COL_ADDR
+        window[1] = x0
+        window[2] = x1
+        window[3] = SET_PAGE_ADDR
+        window[4] = p0
+        window[5] = p1
+        self.write_cmds(window)
+        self.write_data(data)
+
+    def write_cmds(self, cmds):
+        # interfaces that can send a command run in one go override this
+        for cmd in cmds:
+            self.write_cmd(cmd)
 
 
 class SSD1306_I2C(SSD1306):
-    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
+    def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False, warm=False):
         self.i2c = i2c
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
-        super().__init__(width, height, external_vcc)
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
+        self.yield_bus = None  # set_bus(): called between chunks of a long write
+        self.chunk = 0
+        super().__init__(width, height, external_vcc, warm)
+
+    def set_bus(self, i2c, chunk=128):
+        # Route transfers through another I2C-like object, e.g. a bus
+        # manager's device proxy. If it has tomar()/ceder()/largar(), data
+        # writes longer than chunk bytes hold the bus, are split, and
+        # ceder() is called between the pieces so other devices' more
+        # urgent transactions can go first; horizontal addressing carries
+        # the column/page pointer across the pieces.
+        self.i2c = i2c
+        self.yield_bus = getattr(i2c, "ceder", None)
+        self.chunk = chunk if self.yield_bus is not None and hasattr(i2c, "tomar") else 0
 
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
+        if self.stats is not None:
+            self.stats.add(2)
+
+    def write_cmds(self, cmds):
+        # a single control byte with Co=0 makes every following byte a command
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+        if self.stats is not None:
+            self.stats.add(1 + len(cmds))
 
     def write_data(self, buf):
+        if self.chunk and len(buf) > self.chunk:
+            mv = memoryview(buf)
+            self.i2c.tomar()
+            try:
+                for i in range(0, len(buf), self.chunk):
+                    if i:
+                        self.yield_bus()
+                    self._write_data(mv[i : i + self.chunk])
+            finally:
+                self.i2c.largar()
+            return
+        self._write_data(buf)
+
+    def _write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
+        if self.stats is not None:
+            self.stats.add(1 + len(buf))
 
 
 class SSD1306_SPI(SSD1306):
-    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False):
+    def __init__(self, width, height, spi, dc, res, cs, external_vcc=False,
+                 shared_bus=False, warm=False):
         self.rate = 10 * 1024 * 1024
         dc.init(dc.OUT, value=0)
-        res.init(res.OUT, value=0)
+        # RES low resets the panel, so a warm attach keeps it high
+        res.init(res.OUT, value=1 if warm else 0)
         cs.init(cs.OUT, value=1)
         self.spi = spi
         self.dc = dc
         self.res = res
         self.cs = cs
-        import time
-
-        self.res(1)
-        time.sleep_ms(1)
-        self.res(0)
-        time.sleep_ms(10)
+        # the bus is configured once; only a bus shared with devices that
+        # need other settings is reconfigured before each transaction
+        self.shared_bus = shared_bus
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.cmd = bytearray(1)
+        if not warm:
+            self.res(1)
+            time.sleep_ms(1)
+            self.res(0)
+            time.sleep_ms(10)
         self.res(1)
-        super().__init__(width, height, external_vcc)
+        super().__init__(width, height, external_vcc, warm)
 
-    def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+    def _begin(self, dc):
+        if self.shared_bus:
+            self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
-        self.dc(0)
+        self.dc(dc)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+
+    def write_cmd(self, cmd):
+        self.cmd[0] = cmd
+        self.write_cmds(self.cmd)
+
+    def write_cmds(self, cmds):
+        # a whole command run goes out under one DC/CS toggle
+        self._begin(0)
+        self.spi.write(cmds)
         self.cs(1)
+        if self.stats is not None:
+            self.stats.add(len(cmds))
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
-        self.cs(1)
-        self.dc(1)
-        self.cs(0)
+        self._begin(1)
         self.spi.write(buf)
         self.cs(1)
+        if self.stats is not None:
+            self.stats.add(len(buf))
+
+
+def _bus_ok(i2c, addr, tries=32):
+    # the controller must be present and acknowledge a burst of NOPs
+    try:
+        if addr not in i2c.scan():
+            return False
+        nop = b"\x80\xe3"  # Co=1, D/C#=0, NOP
+        for _ in range(tries):
+            i2c.writeto(addr, nop)
+    except OSError:
+        return False
+    return True
+
+
+# (bus, scl, sda, addr) -> full-frame rate of controllers this module has
+# already brought up; the module stays loaded between programs started by
+# the launcher, so a later create_display() can attach to them warm
+_ready = {}
+
+
+def _measure_fps(display, frames=4):
+    start = time.ticks_us()
+    for _ in range(frames):
+        display.show(full=True)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    return frames * 1000000 // max(elapsed, 1)
+
+
+def create_display(width=128, height=64, scl=15, sda=14, bus=1, addr=0x3C,
+                   freqs=(1000000, 400000), verbose=True, warm=None):
+    # Builds the OLED on the fastest bus that works: hardware I2C at each of
+    # freqs in turn, then SoftI2C at its default clock. The bus used is kept
+    # in display.bus, its clock in display.freq (None for SoftI2C) and the
+    # full-frame rate it reached in display.fps.
+    # warm=None attaches without re-initialising (and without measuring the
+    # frame rate again) when this controller was already brought up since
+    # boot; pass True or False to force either way.
+    from machine import Pin, I2C, SoftI2C
+
+    key = (bus, scl, sda, addr)
+    if warm is None:
+        warm = key in _ready
+
+    display = None
+    for freq in freqs:
+        try:
+            i2c = I2C(bus, scl=Pin(scl), sda=Pin(sda), freq=freq)
+        except (ValueError, OSError):
+            continue
+        if _bus_ok(i2c, addr):
+            display = SSD1306_I2C(width, height, i2c, addr, warm=warm)
+            display.bus = "I2C%d %dkHz" % (bus, freq // 1000)
+            display.freq = freq
+            break
+    if display is None:
+        i2c = SoftI2C(scl=Pin(scl), sda=Pin(sda))
+        display = SSD1306_I2C(width, height, i2c, addr, warm=warm)
+        display.bus = "SoftI2C"
+        display.freq = None
+    if warm and key in _ready:
+        display.fps = _ready[key]
+    else:
+        display.fps = _measure_fps(display)
+        _ready[key] = display.fps
+    if verbose:
+        print("SSD1306 on %s: %d full frames/s%s" % (display.bus, display.fps, " (warm)" if warm else ""))
+    return display
@@ -0,0 +1,207 @@
+# Supervisor dos programas executados pelo launcher
+#
+# Os programas rodam sob o supervisor e podem ser interrompidos com o
+# atalho de volta ao menu (Botão A + botão do joystick, segurados por
+# ATALHO_MS), sem reset da placa:
+#
+# - programas assíncronos podem pedir para ser hospedados: definem
+#   `async def main(placa)` e `HOSPEDAR = True`; o corpo do arquivo roda
+#   primeiro e main(placa) vira uma tarefa asyncio, cancelada pelo atalho;
+# - um programa que roda o próprio laço com asyncio.run(...) é hospedado
+#   do mesmo jeito, e o supervisor não chama o main() dele de novo;
+# - programas antigos, com `while True` e sleeps, recebem versões de
+#   time/utime cujas esperas são fatiadas: a cada fatia o supervisor
+#   confere o atalho e levanta Retorno dentro do programa.
+#
+# O atalho é um Acorde de bitdoglab: detectado pelas interrupções dos
+# botões, ele só liga uma flag. Um programa que põe a própria IRQ num dos
+# pinos desliga o Acorde, então as esperas também leem os dois botões e
+# medem o tempo segurado por conta própria.
+#
+# Serviços leves (monitor de bateria, logger) são funções chamadas a cada
+# periodo_ms; rodam nas esperas do menu e dos programas, e como tarefas
+# ao lado dos programas assíncronos.
+
+import sys
+import utime
+from bitdoglab import Acorde, BOTAO_A, JOY_SW
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+FATIA_MS = 10     # maior espera sem conferir o atalho
+ATALHO_MS = 300   # tempo segurando A + joystick para voltar ao menu
+
+
+class Retorno(BaseException):
+    # deriva de BaseException para não ser engolida por `except Exception`
+    pass
+
+
+async def _modelo():
+    pass
+
+
+_FUNCAO_ASYNC = type(_modelo)
+
+
+class Servico:
+    def __init__(self, nome, periodo_ms, funcao):
+        self.nome = nome
+        self.periodo_ms = periodo_ms
+        self.funcao = funcao
+        self.proximo = utime.ticks_ms()
+
+    def talvez(self, agora):
+        if utime.ticks_diff(agora, self.proximo) < 0:
+            return
+        self.proximo = utime.ticks_add(agora, self.periodo_ms)
+        try:
+            self.funcao()
+        except Exception as e:
+            print("Servico %s: %s" % (self.nome, e))
+
+
+class _Tempo:
+    # time/utime visto pelos programas: tudo igual, menos as esperas
+    def __init__(self, real, supervisor):
+        self._real = real
+        self._supervisor = supervisor
+
+    def __getattr__(self, nome):
+        return getattr(self._real, nome)
+
+    def sleep(self, s):
+        self._supervisor.esperar(int(s * 1000))
+
+    def sleep_ms(self, ms):
+        self._supervisor.esperar(ms)
+
+    def sleep_us(self, us):
+        self._supervisor.conferir()
+        self._real.sleep_us(us)
+
+
+class Supervisor:
+    def __init__(self):
+        self.atalho = Acorde((BOTAO_A, JOY_SW), ATALHO_MS, self._pedir_retorno)
+        self.servicos = []
+        self.cancelado = False
+        self.desde = None  # ticks_ms em que o atalho apareceu na leitura dos pinos
+        self.laco_proprio = False  # o programa chamou asyncio.run()
+        self._run_real = asyncio.run
+
+    def _pedir_retorno(self):
+        self.cancelado = True
+
+    def _esperar_soltar(self):
+        # evita que os botões ainda apertados virem comandos no menu
+        while True:
+            for b in self.atalho.botoes:
+                if b.apertado():
+                    break
+            else:
+                break
+            utime.sleep_ms(FATIA_MS)
+        utime.sleep_ms(50)  # repiques
+
+    def servico(self, nome, periodo_ms, funcao):
+        s = Servico(nome, periodo_ms, funcao)
+        self.servicos.append(s)
+        return s
+
+    def rodar_servicos(self):
+        agora = utime.ticks_ms()
+        for s in self.servicos:
+            s.talvez(agora)
+
+    def _sondar(self):
+        # reserva do Acorde, para quando a IRQ de um dos pinos foi trocada
+        if not self.atalho.todos():
+            self.desde = None
+            return
+        agora = utime.ticks_ms()
+        if self.desde is None:
+            self.desde = agora
+        elif utime.ticks_diff(agora, self.desde) >= ATALHO_MS:
+            self.cancelado = True
+
+    def conferir(self):
+        # ponto de interrupção dos programas síncronos
+        self._sondar()
+        if self.cancelado:
+            raise Retorno()
+
+    def esperar(self, ms):
+        fim = utime.ticks_add(utime.ticks_ms(), ms)
+        while True:
+            self.rodar_servicos()
+            self.conferir()
+            resta = utime.ticks_diff(fim, utime.ticks_ms())
+            if resta <= 0:
+                return
+            utime.sleep_ms(min(resta, FATIA_MS))
+
+    def executar(self, codigo, globais):
+        # roda o programa; retorna False se o usuário voltou ao menu
+        originais = {}
+        for nome in ("time", "utime"):
+            real = sys.modules.get(nome) or __import__(nome)
+            originais[nome] = sys.modules.get(nome)
+            sys.modules[nome] = _Tempo(real, self)
+        asyncio.run = self._run
+        self.cancelado = False
+        self.desde = None
+        self.laco_proprio = False
+        try:
+            exec(codigo, globais)
+            main = globais.get("main")
+            if globais.get("HOSPEDAR") and not self.laco_proprio \
+                    and type(main) is _FUNCAO_ASYNC:
+                self._run_real(self._hospedar(main(globais.get("placa"))))
+            return True
+        except Retorno:
+            self._esperar_soltar()
+            return False
+        finally:
+            asyncio.run = self._run_real
+            for nome, modulo in originais.items():
+                if modulo is None:
+                    del sys.modules[nome]
+                else:
+                    sys.modules[nome] = modulo
+            self.cancelado = False
+            self.desde = None
+
+    def _run(self, coro, *args, **kwargs):
+        # asyncio.run() chamado pelo próprio programa: o laço dele ganha o
+        # atalho e os serviços
+        self.laco_proprio = True
+        return self._run_real(self._hospedar(coro), *args, **kwargs)
+
+    async def _hospedar(self, coro):
+        # devolve o resultado de coro, ou levanta Retorno pelo atalho
+        tarefa = asyncio.create_task(coro)
+        servicos = [asyncio.create_task(self._servico(s)) for s in self.servicos]
+        try:
+            while not tarefa.done():
+                self._sondar()
+                if self.cancelado:
+                    tarefa.cancel()
+                    try:
+                        await tarefa  # deixa os finally do programa rodarem
+                    except asyncio.CancelledError:
+                        pass
+                    raise Retorno()
+                await asyncio.sleep_ms(FATIA_MS)
+            return await tarefa  # resultado ou exceção do programa
+        finally:
+            for t in servicos:
+                t.cancel()
+
+    async def _servico(self, s):
+        while True:
+            s.talvez(utime.ticks_ms())
+            await asyncio.sleep_ms(s.periodo_ms)
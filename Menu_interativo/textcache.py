@@ -0,0 +1,61 @@
+# Cache de textos pré-renderizados para o OLED
+#
+# framebuf.text() rasteriza cada caractere a cada chamada. Aqui cada texto
+# é desenhado uma vez num bitmap MONO_VLSB próprio e depois só copiado com
+# FrameBuffer.blit(). A memória é limitada (max_bytes) e os textos menos
+# usados recentemente saem primeiro.
+#
+# Exemplo:
+#   cache = TextCache()
+#   cache.text(oled, "Score:%d" % score, 0, 0)   # mesmo uso de oled.text()
+
+import framebuf
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+
+class TextCache:
+    def __init__(self, max_bytes=2048):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # (texto, cor) -> (FrameBuffer, bytes)
+
+    def get(self, text, color=1):
+        key = (text, color)
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            entry = self._render(text, color)
+            if entry[1] > self.max_bytes:
+                return entry[0]  # maior que o cache inteiro: não guarda
+            while self._cache and self.used + entry[1] > self.max_bytes:
+                oldest = next(iter(self._cache))
+                self.used -= self._cache.pop(oldest)[1]
+            self.used += entry[1]
+        else:
+            self.hits += 1
+        # reinserir deixa o texto no fim da fila, como o mais recente
+        self._cache[key] = entry
+        return entry[0]
+
+    def _render(self, text, color):
+        w = 8 * len(text) or 1
+        buf = bytearray(w)  # uma página de 8 linhas
+        fb = framebuf.FrameBuffer(buf, w, 8, framebuf.MONO_VLSB)
+        if not color:
+            fb.fill(1)
+        fb.text(text, 0, 0, color)
+        return fb, len(buf)
+
+    def text(self, fb, text, x, y, color=1):
+        # como fb.text(): só os pixels do texto são copiados, o fundo fica
+        fb.blit(self.get(text, color), x, y, 1 - color)
+
+    def clear(self):
+        self._cache = OrderedDict()
+        self.used = 0
@@ -0,0 +1,227 @@
+# Widgets para o OLED da BitDogLab (modo retido)
+#
+# Cada widget guarda o próprio estado e só é redesenhado quando esse
+# estado muda. A Screen junta os widgets e faz um único oled.show() por
+# quadro, em refresh(); como o driver só envia as páginas alteradas, mudar
+# uma linha ou uma barra custa só os bytes daquela região.
+#
+# Exemplo:
+#   tela = Screen(oled)
+#   tela.add(Header("TESTE"))
+#   barra = tela.add(ProgressBar(2))
+#   barra.set(50, "50%")
+#   tela.refresh()          # ou tela.sleep_ms(100), que já faz o refresh
+
+import utime
+
+# linhas de texto abaixo do cabeçalho, como nos d_* do TestPlaca
+LINE_Y = 16
+LINE_H = 10
+
+
+def line_y(row):
+    return LINE_Y + row * LINE_H
+
+
+class Widget:
+    def __init__(self, x, y, w, h):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.dirty = True
+
+    def invalidate(self):
+        self.dirty = True
+
+    def overlaps(self, other):
+        return (
+            self.x < other.x + other.w
+            and other.x < self.x + self.w
+            and self.y < other.y + other.h
+            and other.y < self.y + self.h
+        )
+
+    def render(self, fb):
+        # apaga a própria área e desenha o conteúdo atual
+        fb.fill_rect(self.x, self.y, self.w, self.h, 0)
+        self.draw(fb)
+        self.dirty = False
+
+    def draw(self, fb):
+        pass
+
+
+class Label(Widget):
+    # uma linha de texto; inverted desenha texto escuro sobre faixa acesa
+    def __init__(self, row=0, text="", inverted=False, x=0, y=None, w=128, h=LINE_H, chars=16):
+        super().__init__(x, line_y(row) if y is None else y, w, h)
+        self.text = text
+        self.inverted = inverted
+        self.chars = chars
+
+    def set(self, text, inverted=None):
+        if inverted is None:
+            inverted = self.inverted
+        if text != self.text or inverted != self.inverted:
+            self.text = text
+            self.inverted = inverted
+            self.dirty = True
+
+    def draw(self, fb):
+        if self.inverted:
+            fb.fill_rect(self.x, self.y, self.w, self.h, 1)
+        ty = self.y + (self.h - 8) // 2
+        fb.text(self.text[: self.chars], self.x, ty, 0 if self.inverted else 1)
+
+
+class Header(Label):
+    # faixa acesa de 13 pixels no topo da tela
+    def __init__(self, text=""):
+        super().__init__(text=text, inverted=True, y=0, h=13)
+
+    def draw(self, fb):
+        fb.fill_rect(self.x, self.y, self.w, self.h, 1)
+        fb.text(self.text[: self.chars], self.x, self.y + 3, 0)
+
+
+class ProgressBar(Widget):
+    def __init__(self, row=0, pct=0, label="", x=0, y=None):
+        super().__init__(x, line_y(row) if y is None else y, 128, LINE_H)
+        self.pct = pct
+        self.label = label
+
+    def set(self, pct, label=""):
+        if pct != self.pct or label != self.label:
+            self.pct = pct
+            self.label = label
+            self.dirty = True
+
+    def draw(self, fb):
+        y = self.y
+        largura = max(1, int(126 * self.pct / 100))
+        fb.rect(self.x, y + 1, 126, 8, 1)
+        fb.fill_rect(self.x + 1, y + 2, largura, 6, 1)
+        if self.label:
+            fb.text(self.label[:8], self.x + 2, y + 2, 0 if largura > 44 else 1)
+
+
+class Banner(Widget):
+    # resultado de um teste: "[  OK  ]" ou faixa acesa com "[ FALHA ]",
+    # mais até duas linhas de detalhe
+    def __init__(self, ok=True, detail=""):
+        super().__init__(0, 15, 128, 49)
+        self.ok = ok
+        self.detail = detail
+
+    def set(self, ok, detail=""):
+        if ok != self.ok or detail != self.detail:
+            self.ok = ok
+            self.detail = detail
+            self.dirty = True
+
+    def draw(self, fb):
+        if self.ok:
+            fb.text("[  OK  ]", 24, 20, 1)
+        else:
+            fb.fill_rect(0, 15, 128, 14, 1)
+            fb.text("[ FALHA ]", 20, 19, 0)
+        if self.detail:
+            fb.text(self.detail[:16], 0, 36, 1)
+            if len(self.detail) > 16:
+                fb.text(self.detail[16:32], 0, 46, 1)
+
+
+class ListView(Widget):
+    # lista com cursor; mostra `rows` itens a partir do selecionado, como
+    # o desenhar_menu do launcher
+    def __init__(self, items=(), rows=4, y=12, row_h=10):
+        super().__init__(0, y, 128, rows * row_h)
+        self.items = items
+        self.rows = rows
+        self.row_h = row_h
+        self.selected = 0
+
+    def set(self, items, selected=0):
+        if items is not self.items or selected != self.selected:
+            self.items = items
+            self.selected = selected
+            self.dirty = True
+
+    def select(self, selected):
+        if selected != self.selected:
+            self.selected = selected
+            self.dirty = True
+
+    def draw(self, fb):
+        n = len(self.items)
+        for i in range(min(self.rows, n)):
+            nome = self.items[(self.selected + i) % n]
+            prefixo = ">" if i == 0 else " "
+            fb.text(prefixo + " " + nome[:14], self.x, self.y + i * self.row_h, 1)
+
+
+class Screen:
+    def __init__(self, oled):
+        self.oled = oled
+        self.widgets = []
+        self.cleared = True
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        widget.dirty = True
+        return widget
+
+    def replace(self, old, new):
+        # troca um widget por outro na mesma posição da lista
+        self.widgets[self.widgets.index(old)] = new
+        self.oled.fill_rect(old.x, old.y, old.w, old.h, 0)
+        new.dirty = True
+        self._touch(old)
+        return new
+
+    def remove(self, widget):
+        self.widgets.remove(widget)
+        self.oled.fill_rect(widget.x, widget.y, widget.w, widget.h, 0)
+        self._touch(widget)
+
+    def clear(self):
+        # começa uma tela nova; o apagamento só vai no próximo refresh
+        self.widgets = []
+        self.cleared = True
+
+    def _touch(self, area):
+        for w in self.widgets:
+            if w.overlaps(area):
+                w.dirty = True
+
+    def refresh(self):
+        # desenha os widgets alterados e envia tudo num único show()
+        oled = self.oled
+        changed = self.cleared
+        if self.cleared:
+            oled.fill(0)
+            for w in self.widgets:
+                w.dirty = True
+            self.cleared = False
+        widgets = self.widgets
+        for i in range(len(widgets)):
+            w = widgets[i]
+            if w.dirty:
+                w.render(oled)
+                changed = True
+                # quem fica por cima da área apagada é redesenhado também
+                for other in widgets[i + 1 :]:
+                    if not other.dirty and other.overlaps(w):
+                        other.dirty = True
+        if changed:
+            oled.show()
+        return changed
+
+    def sleep_ms(self, ms):
+        self.refresh()
+        # utime buscado na hora: o módulo pode ter sido importado antes do
+        # programa (pré-carregamento do launcher), e a espera tem de passar
+        # pelo utime do supervisor para o atalho de volta ao menu valer
+        import utime
+        utime.sleep_ms(ms)
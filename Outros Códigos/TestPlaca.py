@@ -22,8 +22,9 @@
 #  11.  LED onboard
 # ============================================================
 
-from machine import Pin, PWM, I2C, ADC, SoftI2C
+from machine import Pin, PWM, I2C, ADC
 import neopixel
+from neomatriz import matriz_led
 import utime
 import math
 
@@ -36,94 +37,86 @@ utime.sleep(4)
 # ------------------------------------------------------------
 # DISPLAY SSD1306
 # Pinos conforme a biblioteca entregue: SDA=GP14  SCL=GP15
+# Vem de bitdoglab: o mesmo I2C1 do launcher, sem reabrir o display
 # ------------------------------------------------------------
-from ssd1306 import SSD1306_I2C
+import bitdoglab
 
-i2c_oled = SoftI2C(scl=Pin(15), sda=Pin(14))
-oled = SSD1306_I2C(128, 64, i2c_oled)
+oled = bitdoglab.oled()
 
 # ============================================================
 # UTILITARIOS DE DISPLAY
+# Os d_* so atualizam widgets; a tela e enviada uma unica vez, em
+# espera() ou d_show(), e so com as regioes que mudaram.
 # ============================================================
+from widgets import Screen, Header, Label, ProgressBar, Banner, line_y
+
+tela = Screen(oled)
+linhas = {}  # linha -> widget (Label ou ProgressBar)
+
+def espera(ms):
+    tela.sleep_ms(ms)
 
 def d_clear():
-    oled.fill(0)
+    tela.clear()
+    linhas.clear()
 
 def d_show():
-    oled.show()
+    tela.refresh()
+
+def _linha(row, tipo):
+    w = linhas.get(row)
+    if type(w) is not tipo:
+        novo = tipo(row)
+        if w is None:
+            tela.add(novo)
+        else:
+            tela.replace(w, novo)
+        linhas[row] = w = novo
+    return w
 
 def d_header(titulo, sub=""):
-    oled.fill(0)
-    oled.fill_rect(0, 0, 128, 13, 1)
-    oled.text(titulo[:16], 0, 3, 0)
+    d_clear()
+    tela.add(Header(titulo))
     if sub:
-        oled.text(sub[:16], 0, 16, 1)
-    oled.show()
+        _linha(0, Label).set(sub)
 
 def d_linha(row, texto, destaque=False):
-    y = 16 + row * 10
-    if y + 8 > 64:
+    if line_y(row) + 8 > 64:
         return
-    oled.fill_rect(0, y, 128, 10, 1 if destaque else 0)
-    oled.text(texto[:16], 0, y + 1, 0 if destaque else 1)
-    oled.show()
+    _linha(row, Label).set(texto, destaque)
 
 def d_barra(row, pct, label=""):
-    y = 16 + row * 10
-    if y + 8 > 64:
+    if line_y(row) + 8 > 64:
         return
-    oled.fill_rect(0, y, 128, 10, 0)
-    largura = max(1, int(126 * pct / 100))
-    oled.rect(0, y + 1, 126, 8, 1)
-    oled.fill_rect(1, y + 2, largura, 6, 1)
-    if label:
-        oled.text(label[:8], 2, y + 2, 0 if largura > 44 else 1)
-    oled.show()
+    _linha(row, ProgressBar).set(pct, label)
 
 def d_resultado(nome, resultado, detalhe=""):
-    oled.fill(0)
-    oled.fill_rect(0, 0, 128, 13, 1)
-    oled.text(nome[:16], 0, 3, 0)
-    if resultado == "OK":
-        oled.text("[  OK  ]", 24, 20, 1)
-    else:
-        oled.fill_rect(0, 15, 128, 14, 1)
-        oled.text("[ FALHA ]", 20, 19, 0)
-    if detalhe:
-        oled.text(detalhe[:16], 0, 36, 1)
-        if len(detalhe) > 16:
-            oled.text(detalhe[16:32], 0, 46, 1)
-    oled.show()
-    utime.sleep_ms(2500)
+    d_header(nome)
+    tela.add(Banner(resultado == "OK", detalhe))
+    espera(2500)
 
 def d_espera(l1, l2="", l3="", seg=0):
-    oled.fill(0)
-    oled.fill_rect(0, 0, 128, 13, 1)
-    oled.text("AGUARDANDO...", 0, 3, 0)
-    oled.text(l1[:16], 0, 16, 1)
+    d_header("AGUARDANDO...")
+    tela.add(Label(text=l1, y=15))
     if l2:
-        oled.text(l2[:16], 0, 26, 1)
+        tela.add(Label(text=l2, y=25))
     if l3:
-        oled.text(l3[:16], 0, 36, 1)
+        tela.add(Label(text=l3, y=35))
     if seg:
-        oled.text("Tempo: " + str(seg) + "s", 0, 50, 1)
-    oled.show()
+        tela.add(Label(text="Tempo: " + str(seg) + "s", y=49))
 
 def d_resumo(res):
     ok   = sum(1 for v in res.values() if v == "OK")
     fail = sum(1 for v in res.values() if v == "FAIL")
-    oled.fill(0)
-    oled.fill_rect(0, 0, 128, 13, 1)
-    oled.text("RESUMO FINAL", 0, 3, 0)
-    oled.text("Aprovados: " + str(ok),   0, 16, 1)
-    oled.text("Falhas:    " + str(fail), 0, 26, 1)
-    oled.text("Total:     " + str(len(res)), 0, 36, 1)
+    d_header("RESUMO FINAL")
+    tela.add(Label(text="Aprovados: " + str(ok),   y=15))
+    tela.add(Label(text="Falhas:    " + str(fail), y=25))
+    tela.add(Label(text="Total:     " + str(len(res)), y=35))
     if fail == 0:
-        oled.text("** APROVADA **", 8, 52, 1)
+        tela.add(Label(text="** APROVADA **", x=8, y=51, w=120))
     else:
-        oled.fill_rect(0, 49, 128, 14, 1)
-        oled.text("!! COM FALHAS !!", 0, 52, 0)
-    oled.show()
+        tela.add(Label(text="!! COM FALHAS !!", y=49, h=14, inverted=True))
+    tela.refresh()
 
 def log(msg):
     print(msg)
@@ -143,15 +136,15 @@ def teste_display():
     N = "DISPLAY OLED"
     log("\n=== " + N + " ===")
     d_header(N, "SSD1306 128x64")
-    utime.sleep_ms(1000)
+    espera(1000)
     d_linha(0, "SDA: GP14")
-    utime.sleep_ms(700)
+    espera(700)
     d_linha(1, "SCL: GP15")
-    utime.sleep_ms(700)
+    espera(700)
     d_linha(2, "Addr: 0x3C")
-    utime.sleep_ms(700)
+    espera(700)
     d_linha(3, "Teste visual...")
-    utime.sleep_ms(800)
+    espera(800)
 
     # xadrez
     oled.fill(0)
@@ -160,11 +153,11 @@ def teste_display():
             if (x // 8 + y // 8) % 2 == 0:
                 oled.fill_rect(x, y, 8, 8, 1)
     oled.show()
-    utime.sleep_ms(1000)
+    espera(1000)
 
     # tela cheia
-    oled.fill(1); oled.show(); utime.sleep_ms(500)
-    oled.fill(0); oled.show(); utime.sleep_ms(400)
+    oled.fill(1); oled.show(); espera(500)
+    oled.fill(0); oled.show(); espera(400)
 
     d_resultado(N, "OK", "Imagem visivel?")
     log_res(N, "OK")
@@ -196,13 +189,13 @@ def teste_led_rgb():
         ("Apagando",      0,     0,     0),
     ]
 
-    utime.sleep_ms(600)
+    espera(600)
     for i, (nome, rv, gv, bv) in enumerate(cores):
         d_linha(0, "Cor: " + nome)
         d_barra(2, int((i + 1) * 100 / len(cores)),
                 str(i + 1) + "/" + str(len(cores)))
         rgb(rv, gv, bv)
-        utime.sleep_ms(800)
+        espera(800)
 
     rgb(0, 0, 0)
     r.deinit(); g.deinit(); b.deinit()
@@ -246,10 +239,10 @@ def teste_botoes():
                 det[k] = True
                 log("  Botao " + k + " OK")
                 tela()
-                utime.sleep_ms(200)
+                espera(200)
         if all(det.values()):
             break
-        utime.sleep_ms(50)
+        espera(50)
 
     res = "OK" if all(det.values()) else "FAIL"
     falt = [k for k, v in det.items() if not v]
@@ -265,7 +258,7 @@ def teste_buzzer():
     N = "BUZZER"
     log("\n=== " + N + " ===")
     d_header(N, "GPIO 21")
-    utime.sleep_ms(800)
+    espera(800)
 
     bz = PWM(Pin(21))
     notas = [
@@ -280,15 +273,15 @@ def teste_buzzer():
         d_barra(2, int((i + 1) * 100 / len(notas)),
                 str(i + 1) + "/" + str(len(notas)))
         bz.freq(freq); bz.duty_u16(28000)
-        utime.sleep_ms(300)
-        bz.duty_u16(0); utime.sleep_ms(80)
+        espera(300)
+        bz.duty_u16(0); espera(80)
 
     # Jingle final
     d_linha(0, "Jingle final...")
     for freq, dur in [(523,120),(523,120),(587,280),(523,280),(698,280),(659,480)]:
         bz.freq(freq); bz.duty_u16(25000)
-        utime.sleep_ms(dur)
-        bz.duty_u16(0); utime.sleep_ms(60)
+        espera(dur)
+        bz.duty_u16(0); espera(60)
 
     bz.deinit()
     d_resultado(N, "OK", "Som audivel?")
@@ -298,19 +291,13 @@ def teste_buzzer():
 # ------------------------------------------------------------
 # 5. NEOPIXEL 5x5
 # ------------------------------------------------------------
-LED_MATRIX = [
-    [24,23,22,21,20],
-    [15,16,17,18,19],
-    [14,13,12,11,10],
-    [ 5, 6, 7, 8, 9],
-    [ 4, 3, 2, 1, 0],
-]
+LED_MATRIX = matriz_led()  # LED_MATRIX[y][x] -> índice do LED (serpentina)
 
 def teste_neopixel():
     N = "NEOPIXEL 5x5"
     log("\n=== " + N + " ===")
     d_header(N, "GP7 - 25 LEDs")
-    utime.sleep_ms(800)
+    espera(800)
 
     np = neopixel.NeoPixel(Pin(7), 25)
 
@@ -326,9 +313,9 @@ def teste_neopixel():
         d_barra(2, int((li + 1) * 100 / 5), "Linha " + str(li + 1))
         for idx in linha: np[idx] = cores[li]
         np.write()
-        utime.sleep_ms(500)
-    utime.sleep_ms(400)
-    apaga(); utime.sleep_ms(300)
+        espera(500)
+    espera(400)
+    apaga(); espera(300)
 
     # LED a LED
     d_linha(0, "LED por LED")
@@ -336,15 +323,15 @@ def teste_neopixel():
         np[i] = (25, 25, 25)
         np.write()
         d_barra(2, int((i + 1) * 100 / 25), str(i + 1) + "/25")
-        utime.sleep_ms(100)
-    utime.sleep_ms(400)
+        espera(100)
+    espera(400)
 
     # Pisca verde
     d_linha(0, "Pisca 3x verde")
     for _ in range(3):
         for i in range(25): np[i] = (0, 50, 0)
-        np.write(); utime.sleep_ms(350)
-        apaga(); utime.sleep_ms(200)
+        np.write(); espera(350)
+        apaga(); espera(200)
 
     apaga()
     d_resultado(N, "OK", "LEDs visiveis?")
@@ -369,7 +356,7 @@ def teste_joystick():
              "em todas direcoes",
              "e pressione SW",
              seg=8)
-    utime.sleep_ms(1000)
+    espera(1000)
 
     deadline = utime.ticks_add(utime.ticks_ms(), 8000)
 
@@ -401,7 +388,7 @@ def teste_joystick():
         rest = utime.ticks_diff(deadline, utime.ticks_ms()) // 1000
         oled.text("Tempo: " + str(rest) + "s", 0, 54, 1)
         oled.show()
-        utime.sleep_ms(80)
+        espera(80)
 
     vx = max(lx) - min(lx)
     vy = max(ly) - min(ly)
@@ -427,7 +414,7 @@ def teste_microfone():
              "perto do microfone",
              "",
              seg=5)
-    utime.sleep_ms(1800)
+    espera(1800)
 
     d_header(N, "GP28 - coletando")
     amostras = []
@@ -436,7 +423,7 @@ def teste_microfone():
         if i % 30 == 0:
             pct = int(i * 100 / AMOSTRAS)
             d_barra(1, pct, str(pct) + "%")
-        utime.sleep_ms(5)
+        espera(5)
 
     medio    = sum(amostras) // len(amostras)
     variacao = max(amostras) - min(amostras)
@@ -447,7 +434,7 @@ def teste_microfone():
     d_linha(0, "Medio: " + str(medio))
     d_linha(1, "Variacao: " + str(variacao))
     d_linha(2, "RMS:  " + str(rms))
-    utime.sleep_ms(2000)
+    espera(2000)
 
     medio_ok = 10000 < medio < 55000
     ruido_ok = variacao > 400
@@ -467,7 +454,7 @@ def teste_sensores_internos():
     N = "CHIP INTERNO"
     log("\n=== " + N + " ===")
     d_header(N, "RP2040 on-chip")
-    utime.sleep_ms(800)
+    espera(800)
 
     s_temp = ADC(4)
     s_vref = ADC(3)
@@ -478,7 +465,7 @@ def teste_sensores_internos():
         lt.append(s_temp.read_u16())
         lv.append(s_vref.read_u16())
         d_barra(2, int((i + 1) * 100 / 20), str(i + 1) + "/20")
-        utime.sleep_ms(120)
+        espera(120)
 
     adc_t = sum(lt) / len(lt)
     v_t   = adc_t * (3.3 / 65535)
@@ -494,7 +481,7 @@ def teste_sensores_internos():
     d_linha(0, "Temp.chip: " + t_str)
     d_linha(1, "VREF:      " + v_str)
     d_linha(2, "ADC temp: " + str(int(adc_t)))
-    utime.sleep_ms(2000)
+    espera(2000)
 
     temp_ok = 10.0 < temp < 75.0
     res = "OK" if temp_ok else "FAIL"
@@ -512,7 +499,7 @@ def teste_bateria():
     N = "BATERIA/VSYS"
     log("\n=== " + N + " ===")
     d_header(N, "GP29 - VSYS/3")
-    utime.sleep_ms(800)
+    espera(800)
 
     try:
         vsys = ADC(29)
@@ -526,7 +513,7 @@ def teste_bateria():
     for i in range(30):
         leituras.append(vsys.read_u16())
         d_barra(2, int((i + 1) * 100 / 30), str(i + 1) + "/30")
-        utime.sleep_ms(60)
+        espera(60)
 
     media  = sum(leituras) // len(leituras)
     v_vsys = media * (3.3 / 65535) * 3
@@ -553,7 +540,7 @@ def teste_bateria():
     d_linha(0, "VSYS: " + v_str)
     d_barra(2, pct, str(pct) + "%")
     d_linha(3, fonte)
-    utime.sleep_ms(2000)
+    espera(2000)
 
     res = "OK" if v_vsys > 3.0 else "FAIL"
     log("  VSYS=" + v_str + " (" + fonte + ") " + str(pct) + "%")
@@ -568,8 +555,9 @@ def teste_i2c_scan():
     N = "I2C SCAN"
     log("\n=== " + N + " ===")
     d_header(N, "I2C0 e I2C1")
-    utime.sleep_ms(800)
+    espera(800)
     d_linha(0, "Escaneando...")
+    d_show()
 
     try:
         i0    = I2C(0, scl=Pin(1), sda=Pin(0), freq=100000)
@@ -578,8 +566,8 @@ def teste_i2c_scan():
         devs0 = []
 
     try:
-        i1    = SoftI2C(scl=Pin(15), sda=Pin(14), freq=100000)
-        devs1 = i1.scan()
+        # pelo barramento do OLED; um SoftI2C novo tiraria os pinos dele
+        devs1 = oled.i2c.scan()
     except Exception:
         devs1 = []
 
@@ -590,7 +578,7 @@ def teste_i2c_scan():
     d_linha(1, "")
     d_linha(2, "I2C1:" + str(len(devs1)) + " " + (" ".join(h1[:2]) if h1 else "(vazio)"))
     d_linha(3, "")
-    utime.sleep_ms(2000)
+    espera(2000)
 
     log("  I2C0: " + str(h0))
     log("  I2C1: " + str(h1))
@@ -608,7 +596,7 @@ def teste_led_onboard():
     N = "LED ONBOARD"
     log("\n=== " + N + " ===")
     d_header(N, "LED embutido")
-    utime.sleep_ms(800)
+    espera(800)
     d_linha(0, "Piscando 6x...")
 
     res = "FAIL"
@@ -618,10 +606,10 @@ def teste_led_onboard():
             for i in range(6):
                 led.value(1)
                 d_linha(1, "Estado: ACESO", True)
-                utime.sleep_ms(400)
+                espera(400)
                 led.value(0)
                 d_linha(1, "Estado: APAGADO")
-                utime.sleep_ms(400)
+                espera(400)
             led.off()
             d_linha(2, "Pino: " + str(pino))
             res = "OK"
@@ -671,14 +659,11 @@ def executar_testes():
 
     for nome, funcao in testes:
         n_atual = len(resultados) + 1
-        oled.fill(0)
-        oled.fill_rect(0, 0, 128, 13, 1)
-        oled.text("PROXIMO TESTE:", 0, 3, 0)
-        oled.text(nome[:16], 0, 18, 1)
-        oled.text(str(n_atual) + "/" + str(len(testes)), 96, 50, 1)
+        d_header("PROXIMO TESTE:")
+        tela.add(Label(text=nome, y=17))
+        tela.add(Label(text=str(n_atual) + "/" + str(len(testes)), x=96, y=27, w=32))
         d_barra(3, int(n_atual * 100 / len(testes)), "")
-        oled.show()
-        utime.sleep_ms(1400)
+        espera(1400)
 
         try:
             resultados[nome] = funcao()
@@ -687,7 +672,7 @@ def executar_testes():
             d_resultado(nome, "FAIL", str(e)[:16])
             resultados[nome] = "FAIL"
 
-        utime.sleep_ms(400)
+        espera(400)
 
     d_resumo(resultados)
 
@@ -1,18 +1,15 @@
-from machine import PWM, Pin
-import neopixel
+from machine import Pin, ADC
 import time
 import random
-from machine import Pin, SoftI2C, ADC
-from ssd1306 import SSD1306_I2C
 import math
 import bitdoglab
+from neomatriz import matriz_led
 
 bitdoglab.init()
 
 
 # Configuração do OLED
-i2c = SoftI2C(scl=Pin(15), sda=Pin(14))
-oled = SSD1306_I2C(128, 64, i2c)
+oled = bitdoglab.oled()
 
 joystick_button = Pin(22, Pin.IN, Pin.PULL_UP) 
 #______________________________________________
@@ -22,17 +19,31 @@ joystick_button = Pin(22, Pin.IN, Pin.PULL_UP)
 # Número de LEDs na sua matriz 5x5
 NUM_LEDS = 25
 
-# Inicializar a matriz de NeoPixels no GPIO7
-np = neopixel.NeoPixel(Pin(7), NUM_LEDS)
+# Matriz de NeoPixels no GPIO7
+np = bitdoglab.matriz()
+
+# Animações .anim (geradas por Ferramentas/anim_conv.py a partir dos .json
+# da pasta animacoes, que fica ao lado deste arquivo)
+try:
+    _dir = __file__.rsplit("/", 1)[0] if "/" in __file__ else "."
+except NameError:
+    _dir = "."
+ANIMACOES = _dir + "/animacoes/"
+tocador = bitdoglab.tocador()
+
+def animar(nome):
+    # começa a animação e retorna na hora; ela segue pelo Timer do tocador
+    try:
+        tocador.tocar(ANIMACOES + nome + ".anim")
+    except OSError:
+        print("Animacao nao encontrada:", ANIMACOES + nome + ".anim")
+
+def esperar_animacao():
+    while tocador.tocando:
+        time.sleep(0.01)
 
 # Definindo a matriz de LEDs
-LED_MATRIX = [
-    [24, 23, 22, 21, 20],
-    [15, 16, 17, 18, 19],
-    [14, 13, 12, 11, 10],
-    [5, 6, 7, 8, 9],
-    [4, 3, 2, 1, 0]
-]
+LED_MATRIX = matriz_led()  # LED_MATRIX[y][x] -> índice do LED (serpentina)
 
 # Inicializar ADC para os pinos VRx (GPIO26) e VRy (GPIO27)
 adc_vrx = ADC(Pin(26))
@@ -52,18 +63,11 @@ def update_oled(lines):
     oled.show()
 
 
-# Configurando o LED RGB
-led_r = PWM(Pin(12))
-led_g = PWM(Pin(13))
-led_b = PWM(Pin(11))
-
-led_r.freq(1000)
-led_g.freq(1000)
-led_b.freq(1000)
-
-# Configuração do NeoPixel
-NUM_LEDS = 25
-np = neopixel.NeoPixel(Pin(7), NUM_LEDS)
+# Configurando o LED RGB (PWM a 1 kHz)
+led_rgb = bitdoglab.led_rgb()
+led_r = led_rgb.r
+led_g = led_rgb.g
+led_b = led_rgb.b
 
 # Configuração dos botões
 button_a = Pin(5, Pin.IN, Pin.PULL_UP)
@@ -80,9 +84,9 @@ WHITE = (25, 25, 25)
 BLACK = (0, 0, 0)
 
 # Configuração do Buzzer
-buzzer1 = PWM(Pin(21))
+buzzer1 = bitdoglab.buzzer_a()
 buzzer1.freq(50)  # Frequência inicial grave
-buzzer2 = PWM(Pin(10))
+buzzer2 = bitdoglab.buzzer_b()
 buzzer2.freq(50)  # Frequência inicial grave
 
 def gradual_light_sound(duration=2):
@@ -193,6 +197,7 @@ def dim_leds(led_sequence, current_index):
     
 # apagar todos os LEDs
 def clear_all():
+    tocador.parar()  # uma animação em andamento não reacende os LEDs
     for i in range(len(np)):
         np[i] = BLACK
     np.write()
@@ -219,17 +224,7 @@ def heartbeat_effect(sequence):
 
 def heart():
     """Acende um coração grande na matriz de LEDs."""
-    # Primeiro, desligamos todos os LEDs para garantir que começa "limpo"
-    clear_all()
-    
-    # Lista dos LEDs que devem ser acesos para o coração
-    heart_leds = [2, 6, 14, 15, 23, 17, 21, 19, 10, 8]
-    
-    # Acendendo os LEDs em vermelho
-    for led in heart_leds:
-        np[led] = (255, 0, 0)  # RED
-    
-    np.write()
+    animar("heart")
     
 # Define O CÓDIGO DE ACENDER OS LEDs DO CORAÇÃO ALEATORIAMENTE
 def random_color(dim_factor=1):
@@ -301,21 +296,8 @@ def l3_37_sound_and_lights():
         buzzer2.duty_u16(0)
 
 def smile_face():
-    # Definindo a sequência de cores
-    colors = [
-        BLACK, BLUE, BLUE, BLUE, BLACK,
-        BLUE, BLACK, BLACK, BLACK, BLUE,
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        BLACK, CYAN, BLACK, CYAN, BLACK,
-        BLACK, BLACK, BLACK, BLACK, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
+    animar("smile")
+
 def blink_right_eye():
     np[0] = BLACK
     np[1] = BLUE
@@ -479,84 +461,24 @@ def triple_zero_sound():
     buzzer2.duty_u16(0)
     
 def seta_Direita():
-    np[0] = BLACK
-    np[1] = BLACK
-    np[2] = YELLOW
-    np[3] = BLACK
-    np[4] = BLACK
-    np[5] = BLACK
-    np[6] = BLACK
-    np[7] = BLACK
-    np[8] = YELLOW
-    np[9] = BLACK
-    np[10] = YELLOW
-    np[11] = YELLOW
-    np[12] = YELLOW
-    np[13] = YELLOW
-    np[14] = YELLOW
-    np[15] = BLACK
-    np[16] = BLACK
-    np[17] = BLACK
-    np[18] = YELLOW
-    np[19] = BLACK
-    np[20] = BLACK
-    np[21] = BLACK
-    np[22] = YELLOW
-    np[23] = BLACK
-    np[24] = BLACK
-    np.write()
+    # pisca a seta e deixa acesa
+    animar("seta_direita")
     # Desliga o buzzer ao final
     buzzer1.duty_u16(0)
     buzzer2.duty_u16(0)
     
     
 def seta_Esquerda():
-    np[0] = BLACK
-    np[1] = BLACK
-    np[2] = YELLOW
-    np[3] = BLACK
-    np[4] = BLACK
-    np[5] = BLACK
-    np[6] = YELLOW
-    np[7] = BLACK
-    np[8] = BLACK
-    np[9] = BLACK
-    np[10] = YELLOW
-    np[11] = YELLOW
-    np[12] = YELLOW
-    np[13] = YELLOW
-    np[14] = YELLOW
-    np[15] = BLACK
-    np[16] = YELLOW
-    np[17] = BLACK
-    np[18] = BLACK
-    np[19] = BLACK
-    np[20] = BLACK
-    np[21] = BLACK
-    np[22] = YELLOW
-    np[23] = BLACK
-    np[24] = BLACK
-    np.write()
+    # pisca a seta e deixa acesa
+    animar("seta_esquerda")
     # Desliga o buzzer ao final
     buzzer1.duty_u16(0)
     buzzer2.duty_u16(0)
     
     
 def xplosion():
-    # Definindo a sequência de cores
-    colors = [
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        BLACK, BLACK, RED, BLACK, BLACK,
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        BLACK, BLACK, BLACK, BLACK, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
+    # os quadros saem do arquivo enquanto o som toca
+    animar("xplosion")
     
     time.sleep(.1)
     
@@ -570,120 +492,9 @@ def xplosion():
         buzzer2.freq(freq)
         buzzer2.duty_u16(32767)  # 50% de duty cycle
         time.sleep(0.005)
-        
-    colors = [
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        BLACK, BLACK, RED, BLACK, BLACK,
-        BLACK, RED, BLUE, RED, BLACK,
-        BLACK, BLACK, RED, BLACK, BLACK,
-        BLACK, BLACK, BLACK, BLACK, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
-    time.sleep(.2)
-    
-        
-    colors = [
-        BLACK, BLACK, RED, BLACK, BLACK,
-        BLACK, RED, BLUE, RED, BLACK,
-        RED, BLUE, WHITE, BLUE, RED,
-        BLACK, RED, BLUE, RED, BLACK,
-        BLACK, BLACK, RED, BLACK, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
-    time.sleep(.2)
-    
-    colors = [
-        BLACK, RED, RED, RED, BLACK,
-        RED, BLUE, WHITE, BLUE, RED,
-        RED, WHITE, WHITE, WHITE, RED,
-        RED, BLUE, WHITE, BLUE, RED,
-        BLACK, RED, RED, RED, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
-    time.sleep(.2)
-    
-    colors = [
-        BLACK, WHITE, WHITE, WHITE, BLACK,
-        WHITE, WHITE, WHITE, WHITE, WHITE,
-        WHITE, WHITE, BLACK, WHITE, WHITE,
-        WHITE, WHITE, WHITE, WHITE, WHITE,
-        BLACK, WHITE, WHITE, WHITE, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
-        
-    time.sleep(.1)
-    
-    colors = [
-        BLACK, WHITE, WHITE, WHITE, BLACK,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        BLACK, WHITE, WHITE, WHITE, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
-    time.sleep(.2)
-    
-    colors = [
-        BLACK, WHITE, BLACK, WHITE, BLACK,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        BLACK, WHITE, BLACK, WHITE, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
-    
     
-    clear_all()
-    time.sleep(.2)
-    
-    colors = [
-        BLACK, WHITE, BLACK, WHITE, BLACK,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        BLACK, BLACK, BLACK, BLACK, BLACK,
-        WHITE, BLACK, BLACK, BLACK, WHITE,
-        BLACK, WHITE, BLACK, WHITE, BLACK
-    ]
-    
-    # Atribuindo as cores à matriz np
-    for i, color in enumerate(colors):
-        np[i] = color
-    
-    np.write()
+    # os ecos começam com as faíscas no último quadro
+    esperar_animacao()
     
     # Reverberações ou ecos mais suaves
     for _ in range(5):
@@ -822,15 +633,7 @@ indice_cor = 0  # Índice da cor atual na lista de cores
 
 while True:
     # Primeira parte: Seta esquerda e espera pelo botão A
-    seta_Esquerda()
-    time.sleep(.5)
-    clear_all()
-    time.sleep(.2)
-    seta_Esquerda()
-    time.sleep(.3)
-    clear_all()
-    time.sleep(.3)
-    seta_Esquerda()
+    seta_Esquerda()  # pisca enquanto a mensagem aparece
     
 
     
@@ -854,15 +657,7 @@ while True:
     xplosion()
     
     # Segunda parte: Seta direita e espera pelo botão B
-    seta_Direita()
-    time.sleep(.5)
-    clear_all()
-    time.sleep(.2)
-    seta_Direita()
-    time.sleep(.3)
-    clear_all()
-    time.sleep(.3)
-    seta_Direita()
+    seta_Direita()  # pisca enquanto a mensagem aparece
        
 
     messages = [